@@ -0,0 +1,89 @@
+"""Micro-benchmark of media file name validation.
+
+Compares the table-driven validators of `hyko_sdk.io` with the previous
+per-type implementation, which parsed every name with `UUID` and `Ext`, scanned
+a list of extensions and built an HTTP client for every validated name.
+
+Also reports the memory held by a validated `list[Image]` port.
+
+Run from the repository root with `python -m benchmarks.bench_file_names`.
+"""
+
+import json
+import os
+import timeit
+import tracemalloc
+from uuid import UUID, uuid4
+
+import httpx
+from pydantic import TypeAdapter
+
+from hyko_sdk.components.components import Ext
+from hyko_sdk.io import Image
+from hyko_sdk.models import StorageConfig
+
+ITEMS = 10_000
+
+
+def legacy_validate_file_name(file_name: str):
+    obj_id, obj_ext = os.path.splitext(file_name)
+    obj_id = UUID(obj_id.split("_")[0])
+    obj_ext = Ext(obj_ext.lstrip("."))
+    assert obj_ext.value in [
+        Ext.PNG,
+        Ext.JPEG,
+        Ext.MPEG,
+        Ext.TIFF,
+        Ext.TIF,
+        Ext.BMP,
+        Ext.JP2,
+        Ext.DIB,
+        Ext.PGM,
+        Ext.PPM,
+        Ext.PNM,
+        Ext.RAS,
+        Ext.HDR,
+        Ext.WEBP,
+        Ext.JPG,
+    ], "Invalid file extension for Image error"
+    image = Image(obj_ext=obj_ext, file_name=file_name)
+    client = httpx.AsyncClient(
+        base_url=StorageConfig.host,
+        verify=False,
+        cookies={
+            "access_token": f"Bearer {StorageConfig.access_token}",
+            "refresh_token": f"Bearer {StorageConfig.refresh_token}",
+        },
+        timeout=10,
+    )
+    return image, client
+
+
+def best_of(stmt, number: int = 3, repeat: int = 5) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+
+
+def main():
+    StorageConfig.configure("token", "token", "http://localhost")
+    names = [f"{uuid4()}.png" for _ in range(ITEMS)]
+    adapter = TypeAdapter(list[Image])
+
+    legacy = best_of(lambda: [legacy_validate_file_name(name) for name in names])
+    current = best_of(lambda: [Image.validate_file_name(name) for name in names])
+    payload = json.dumps(names)
+    ported = best_of(lambda: adapter.validate_json(payload))
+
+    print(f"validate {ITEMS} names, legacy: {legacy * 1e3:.1f} ms")
+    print(f"validate {ITEMS} names, current: {current * 1e3:.1f} ms")
+    print(f"speedup: {legacy / current:.1f}x")
+    print(f"list[Image] port from JSON: {ported * 1e3:.1f} ms")
+
+    tracemalloc.start()
+    images = adapter.validate_json(payload)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"list[Image] of {len(images)} items holds {size / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Micro-benchmark of port metadata generation for `set_input` and friends.
+
+Compares `PortSchema`, which builds the ports from one generated JSON schema,
+with validating the schema through `JsonSchemaGeneratorWithComponents` and
+`CustomJsonSchema` as the nodes did before.
+
+Run from the repository root with `python -m benchmarks.bench_port_schema`.
+"""
+
+import timeit
+from typing import Any
+
+from pydantic import create_model
+
+from hyko_sdk.io import Image
+from hyko_sdk.json_schema import (
+    CustomJsonSchema,
+    JsonSchemaGeneratorWithComponents,
+    PortSchema,
+)
+from hyko_sdk.models import CoreModel, FieldMetadata
+from hyko_sdk.utils import field
+
+PORTS = 1_000
+
+Item = create_model(
+    "Item",
+    __base__=CoreModel,
+    name=(str, field(description="name")),
+    count=(int, field(description="count", default=1)),
+)
+
+fields: dict[str, Any] = {}
+for i in range(PORTS):
+    port_type = (int, str, float, Image, list[int], Item, list[Item])[i % 7]
+    fields[f"port_{i}"] = (port_type, field(description=f"port {i}"))
+Ports = create_model("Ports", __base__=CoreModel, **fields)
+
+
+def legacy():
+    schema = CustomJsonSchema.model_validate(
+        Ports.model_json_schema(
+            schema_generator=JsonSchemaGeneratorWithComponents,
+            ref_template="{model}",
+        )
+    )
+    return {
+        name: FieldMetadata(name=name, **prop.model_dump())
+        for name, prop in schema.properties.items()
+    }
+
+
+def current():
+    return {
+        name: FieldMetadata(name=name, **port)
+        for name, port in PortSchema.from_model(Ports).fields().items()
+    }
+
+
+def best_of(stmt, number: int = 3, repeat: int = 5) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+
+
+def main():
+    before = best_of(legacy)
+    after = best_of(current)
+
+    print(f"{PORTS} ports, legacy: {before * 1e3:.1f} ms")
+    print(f"{PORTS} ports, current: {after * 1e3:.1f} ms")
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
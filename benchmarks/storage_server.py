@@ -0,0 +1,41 @@
+"""Stand-in storage server on a background thread, used by the benchmark suite.
+
+Serves `hyko_sdk.storage_server` on a temporary directory with uvicorn, so the
+SDK goes through a real HTTP round trip.
+"""
+
+import socket
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+import uvicorn
+
+from hyko_sdk.storage_server import create_storage_app
+
+
+@contextmanager
+def running_storage_server() -> Iterator[tuple[str, str]]:
+    """Serve a fresh stand-in storage, yields its base URL and directory."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    host, port = sock.getsockname()
+
+    with tempfile.TemporaryDirectory() as root:
+        config = uvicorn.Config(
+            create_storage_app(root), log_level="warning", lifespan="off"
+        )
+        server = uvicorn.Server(config)
+        thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]})
+        thread.start()
+        try:
+            while not server.started:
+                if not thread.is_alive():
+                    raise RuntimeError("stand-in storage server failed to start")
+                threading.Event().wait(0.01)
+            yield f"http://{host}:{port}", root
+        finally:
+            server.should_exit = True
+            thread.join()
+            sock.close()
@@ -0,0 +1,514 @@
+"""Benchmark suite with stored baselines.
+
+Measures node call overhead, metadata generation, file name validation, media
+encoding and decoding at several sizes, and storage reads and writes, both
+against a local stand-in server (`benchmarks.storage_server`) and with the
+local filesystem backend.
+
+Run from the repository root:
+
+    python -m benchmarks.suite                  # compare with the baseline
+    python -m benchmarks.suite --save           # record a new baseline
+    python -m benchmarks.suite -k image -k node # only matching benchmarks
+
+Every benchmark reports the best time per operation over several repeats.
+Comparing exits with status 1 when a benchmark is slower than its baseline by
+more than `--threshold` (25% by default). Baselines depend on the machine, so
+record them on the machine that compares against them.
+"""
+
+import argparse
+import asyncio
+import atexit
+import inspect
+import itertools
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Optional, Union
+from uuid import uuid4
+
+import httpx
+import numpy as np
+from pydantic import create_model
+
+from hyko_sdk.cache import MetadataCache
+from hyko_sdk.components.components import Ext
+from hyko_sdk.definitions import ToolkitNode
+from hyko_sdk.io import CSV, Audio, HykoBaseType, Image, upload_scope
+from hyko_sdk.models import CoreModel, StorageConfig, UploadMode
+from hyko_sdk.server import create_app
+from hyko_sdk.storage import HTTPStorage, data_cache
+from hyko_sdk.utils import field
+
+from .storage_server import running_storage_server
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+Operation = Callable[[], Union[Any, Awaitable[Any]]]
+Setup = Callable[[], Awaitable[Operation]]
+
+BENCHMARKS: dict[str, Setup] = {}
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    """Register an async setup returning the operation to time."""
+
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+class SkipError(Exception):
+    """Raised by a setup when the benchmark cannot run here."""
+
+
+# Node call overhead
+
+bench_node = ToolkitNode(name="benchmark node", description="Benchmark node")
+
+
+@bench_node.set_input
+class BenchInputs(CoreModel):
+    value: int = field(description="value")
+    image: Image = field(description="image")
+
+
+@bench_node.set_output
+class BenchOutputs(CoreModel):
+    value: int = field(description="value")
+
+
+@bench_node.on_call
+async def bench_call(inputs: BenchInputs, params: CoreModel):
+    return BenchOutputs(value=inputs.value)
+
+
+@benchmark("node.call")
+async def node_call() -> Operation:
+    inputs = {"value": 1, "image": f"{uuid4()}.png"}
+    storage_config = StorageConfig(
+        refresh_token="token", access_token="token", host=StorageConfig.host
+    )
+    return lambda: bench_node.call(inputs, {}, storage_config)
+
+
+# Executor requests, through the ASGI app without a network
+
+text_node = ToolkitNode(name="benchmark text node", description="Benchmark node")
+
+
+@text_node.set_input
+class TextInputs(CoreModel):
+    text: str = field(description="text")
+    count: int = field(description="count", default=1)
+
+
+@text_node.set_output
+class TextOutputs(CoreModel):
+    words: list[str] = field(description="words")
+
+
+@text_node.on_call
+async def text_call(inputs: TextInputs, params: CoreModel):
+    return TextOutputs(words=inputs.text.split() * inputs.count)
+
+
+def server_request(method: str, url: str, **kwargs: Any) -> Setup:
+    async def setup() -> Operation:
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=create_app()),  # type: ignore
+            base_url="http://executor",
+        )
+
+        async def request():
+            res = await client.request(method, url, **kwargs)
+            res.raise_for_status()
+
+        return request
+
+    return setup
+
+
+def call_body(count: int) -> dict[str, Any]:
+    return {
+        "inputs": {
+            "text": "the quick brown fox jumps over the lazy dog",
+            "count": count,
+        },
+        "storage_config": {"refresh_token": "t", "access_token": "t", "host": "t"},
+    }
+
+
+benchmark("server.call[small]")(
+    server_request("POST", "/call/benchmark text node", json=call_body(1))
+)
+benchmark("server.call[1k words]")(
+    server_request("POST", "/call/benchmark text node", json=call_body(111))
+)
+benchmark("server.metadata")(server_request("GET", "/metadata"))
+
+
+# Metadata generation
+
+Item = create_model(
+    "Item",
+    __base__=CoreModel,
+    name=(str, field(description="name")),
+    count=(int, field(description="count", default=1)),
+)
+Ports = create_model(
+    "Ports",
+    __base__=CoreModel,
+    **{
+        f"port_{i}": (
+            (int, str, float, Image, list[int], Item, list[Item])[i % 7],
+            field(description=f"port {i}"),
+        )
+        for i in range(50)
+    },
+)
+
+
+@benchmark("metadata.fields")
+async def metadata_fields() -> Operation:
+    MetadataCache.configure(None)
+    return lambda: bench_node.fields_to_metadata(Ports)
+
+
+@benchmark("metadata.build")
+async def metadata_build() -> Operation:
+    return bench_node.build_metadata
+
+
+# File name validation
+
+
+@benchmark("io.validate_file_name")
+async def validate_file_name() -> Operation:
+    names = [f"{uuid4()}.png" for _ in range(1_000)]
+    return lambda: [Image.validate_file_name(name) for name in names]
+
+
+# Media codecs
+
+IMAGE_SIZES = (64, 512, 2048)
+AUDIO_SECONDS = (1, 10, 60)
+SAMPLING_RATE = 16_000
+
+
+def image_array(size: int) -> np.ndarray[Any, Any]:
+    rng = np.random.default_rng(0)
+    # A gradient with some noise compresses like a photo, unlike pure noise.
+    gradient = np.linspace(0, 200, size, dtype=np.float32)
+    noise = rng.integers(0, 50, (size, size, 3))
+    return (gradient[:, None, None] + noise).astype(np.uint8)
+
+
+def audio_array(seconds: int) -> np.ndarray[Any, Any]:
+    t = np.arange(seconds * SAMPLING_RATE) / SAMPLING_RATE
+    return (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+async def encoded(media: Awaitable[HykoBaseType]) -> bytes:
+    """File data of new media, encoded without storing it."""
+    with upload_scope(UploadMode.LAZY):
+        return (await media).produce()
+
+
+def image_encode(size: int) -> Setup:
+    async def setup() -> Operation:
+        arr = image_array(size)
+
+        async def encode():
+            await encoded(Image.from_ndarray(arr))
+
+        return encode
+
+    return setup
+
+
+def image_decode(size: int) -> Setup:
+    async def setup() -> Operation:
+        data = await encoded(Image.from_ndarray(image_array(size)))
+        return lambda: Image(obj_ext=Ext.PNG).decode_data(data)
+
+    return setup
+
+
+def audio_encode(seconds: int) -> Setup:
+    async def setup() -> Operation:
+        arr = audio_array(seconds)
+
+        async def encode():
+            await encoded(Audio.from_ndarray(arr, SAMPLING_RATE))
+
+        return encode
+
+    return setup
+
+
+def audio_decode(seconds: int) -> Setup:
+    async def setup() -> Operation:
+        if shutil.which("ffmpeg") is None:
+            raise SkipError("ffmpeg is not installed")
+        data = await encoded(Audio.from_ndarray(audio_array(seconds), SAMPLING_RATE))
+
+        async def decode():
+            audio = Audio(obj_ext=Ext.MP3)
+            audio.cached_value = data
+            await audio.decode()
+
+        return decode
+
+    return setup
+
+
+for size in IMAGE_SIZES:
+    benchmark(f"image.encode[{size}px]")(image_encode(size))
+    benchmark(f"image.decode[{size}px]")(image_decode(size))
+for seconds in AUDIO_SECONDS:
+    benchmark(f"audio.encode[{seconds}s]")(audio_encode(seconds))
+    benchmark(f"audio.decode[{seconds}s]")(audio_decode(seconds))
+
+
+# Storage, over HTTP against the stand-in server and on the local filesystem
+
+storage_url = ""
+storage_root = ""
+STORAGE_SIZES = {"64KiB": 64 * 1024, "1MiB": 1024 * 1024, "8MiB": 8 * 1024 * 1024}
+
+
+def storage_host(backend: str) -> tuple[str, str]:
+    """Storage host of a backend, and the directory its files end up in."""
+    if backend == "http":
+        # Set by the runner to the stand-in server.
+        return storage_url, storage_root
+    root = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, root, ignore_errors=True)
+    return f"file://{root}", root
+
+
+def payload(ext: Ext, size: int) -> bytes:
+    """Incompressible bytes, or CSV rows for CSV files."""
+    if ext != Ext.CSV:
+        return os.urandom(size)
+    rng = np.random.default_rng(0)
+    rows = [b"id,node,duration,status\n"]
+    while sum(map(len, rows)) < size:
+        for i, duration in enumerate(rng.exponential(0.1, 1000)):
+            rows.append(f"{i},node_{i % 17},{duration:.6f},ok\n".encode())
+    return b"".join(rows)[:size]
+
+
+def media(ext: Ext, file_name: Optional[str] = None) -> HykoBaseType:
+    return (CSV if ext == Ext.CSV else Image)(obj_ext=ext, file_name=file_name)
+
+
+def storage_save(backend: str, size: int, ext: Ext = Ext.PNG) -> Setup:
+    async def setup() -> Operation:
+        host, root = storage_host(backend)
+        data = bytearray(payload(ext, size))
+        count = itertools.count()
+
+        async def save():
+            StorageConfig.host = host
+            # Fresh content every time, identical uploads are deduplicated.
+            data[:8] = b"%08d" % (next(count) % 10**8)
+            stored = media(ext)
+            await stored.save(data)  # type: ignore
+            # Keep the disk from filling up.
+            os.unlink(os.path.join(root, stored.file_name))
+
+        return save
+
+    return setup
+
+
+def storage_save_duplicate(backend: str, size: int) -> Setup:
+    async def setup() -> Operation:
+        host, _ = storage_host(backend)
+        StorageConfig.host = host
+        data = os.urandom(size)
+        await Image(obj_ext=Ext.PNG).save(data)
+
+        async def save():
+            StorageConfig.host = host
+            await Image(obj_ext=Ext.PNG).save(data)
+
+        return save
+
+    return setup
+
+
+def storage_get(
+    backend: str, size: int, ext: Ext = Ext.PNG, view: bool = False
+) -> Setup:
+    async def setup() -> Operation:
+        host, _ = storage_host(backend)
+        StorageConfig.host = host
+        stored = media(ext)
+        await stored.save(payload(ext, size))
+
+        async def get():
+            StorageConfig.host = host
+            # Measure the read, not the shared data cache.
+            data_cache.clear()
+            if view:
+                await media(ext, stored.file_name).get_view()
+            else:
+                await media(ext, stored.file_name).get_data()
+
+        return get
+
+    return setup
+
+
+for backend in ("http", "local"):
+    for label, size in STORAGE_SIZES.items():
+        benchmark(f"storage.{backend}.save[{label}]")(storage_save(backend, size))
+        benchmark(f"storage.{backend}.get[{label}]")(storage_get(backend, size))
+        benchmark(f"storage.{backend}.save_duplicate[{label}]")(
+            storage_save_duplicate(backend, size)
+        )
+# Local files are mapped instead of copied.
+for label, size in STORAGE_SIZES.items():
+    benchmark(f"storage.local.get_view[{label}]")(storage_get("local", size, view=True))
+# CSV is gzip encoded in transit, the loopback link shows its CPU cost only.
+for label, size in STORAGE_SIZES.items():
+    benchmark(f"storage.http.save_csv[{label}]")(storage_save("http", size, Ext.CSV))
+    benchmark(f"storage.http.get_csv[{label}]")(storage_get("http", size, Ext.CSV))
+
+
+# Runner
+
+
+async def measure(
+    operation: Operation, repeat: int, min_time: float
+) -> tuple[float, int]:
+    """Best time per operation, and the number of operations per repeat."""
+
+    async def timed(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            result = operation()
+            if inspect.isawaitable(result):
+                await result
+        return time.perf_counter() - start
+
+    # Calibrate like `timeit.autorange`, each repeat runs at least `min_time`.
+    number = 1
+    while (duration := await timed(number)) < min_time:
+        number = max(number * 2, int(number * min_time / max(duration, 1e-9)))
+    best = duration / number
+    for _ in range(repeat - 1):
+        best = min(best, await timed(number) / number)
+    return best, number
+
+
+def load_baseline(path: str) -> dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)["results"]
+
+
+def save_baseline(path: str, results: dict[str, float]):
+    with open(path, "w") as file:
+        json.dump(
+            {
+                "machine": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "processor": platform.processor() or platform.machine(),
+                },
+                "results": dict(sorted(results.items())),
+            },
+            file,
+            indent=2,
+        )
+        file.write("\n")
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+async def run(
+    names: list[str], baseline: dict[str, float], threshold: float, repeat: int
+) -> tuple[dict[str, float], list[str]]:
+    results: dict[str, float] = {}
+    regressions: list[str] = []
+    global storage_url, storage_root
+    with running_storage_server() as (storage_url, storage_root):
+        StorageConfig.configure("token", "token", storage_url)
+        # The stand-in server decodes compressed uploads.
+        compress_uploads = HTTPStorage.compress_uploads
+        HTTPStorage.configure(compress_uploads=True)
+        try:
+            for name in names:
+                try:
+                    operation = await BENCHMARKS[name]()
+                except SkipError as skip:
+                    print(f"{name:<28} skipped: {skip}")
+                    continue
+
+                best, number = await measure(operation, repeat, min_time=0.2)
+                results[name] = best
+
+                line = f"{name:<28} {format_time(best):>10}  ({number} ops x {repeat})"
+                previous: Optional[float] = baseline.get(name)
+                if previous:
+                    change = best / previous - 1
+                    line += f"  {change:+.1%} vs baseline"
+                    if change > threshold:
+                        line += "  REGRESSION"
+                        regressions.append(name)
+                print(line, flush=True)
+        finally:
+            HTTPStorage.configure(compress_uploads=compress_uploads)
+    return results, regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="filters", action="append", default=[])
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="record a new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    names = [
+        name
+        for name in BENCHMARKS
+        if not args.filters or any(pattern in name for pattern in args.filters)
+    ]
+    baseline = load_baseline(args.baseline)
+    results, regressions = asyncio.run(
+        run(names, {} if args.save else baseline, args.threshold, args.repeat)
+    )
+
+    if args.save:
+        # Keep the baseline of benchmarks that were filtered out or skipped.
+        kept = {name: best for name, best in baseline.items() if name in BENCHMARKS}
+        save_baseline(args.baseline, {**kept, **results})
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+import dataclasses
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from enum import Enum
+from functools import cache
+from importlib import metadata
+from types import CodeType
+from typing import Any, Iterator, Optional, Type, get_args
+from uuid import uuid4
+
+import aiofiles
+import pydantic
+from pydantic import BaseModel, computed_field
+
+from .models import FieldMetadata
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+    @computed_field
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+
+class ResultCache:
+    """LRU cache of node outputs with an optional time to live in seconds."""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int: ...
+
+    async def get(self, key: str) -> Optional[BaseModel]: ...
+
+    async def set(self, key: str, value: BaseModel) -> None: ...
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            size=len(self),
+        )
+
+    def expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+
+class MemoryCache(ResultCache):
+    """Cache kept in memory, outputs are stored in their JSON form.
+
+    Media are kept by file name and rebuilt with `model` on a hit, so cached
+    entries never hold on to their data or decoded values.
+    """
+
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        max_size: int = 1024,
+        ttl: Optional[float] = None,
+    ):
+        super().__init__(max_size, ttl)
+        self.model = model
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[BaseModel]:
+        entry = self._entries.get(key)
+        if entry is None or self.expired(entry[0]):
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self.model.model_validate_json(entry[1])
+
+    async def set(self, key: str, value: BaseModel) -> None:
+        self._entries[key] = (time.time(), value.model_dump_json(by_alias=True))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class DiskCache(ResultCache):
+    """Cache persisted as one JSON file per entry, shared across restarts.
+
+    Outputs are stored in their JSON form, media by file name, and rebuilt with
+    `model` on a hit. Recency is tracked with the files modification time.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        model: Type[BaseModel],
+        max_size: int = 1024,
+        ttl: Optional[float] = None,
+    ):
+        super().__init__(max_size, ttl)
+        self.directory = directory
+        self.model = model
+        os.makedirs(directory, exist_ok=True)
+
+        self._keys: set[str] = {
+            file_name.removesuffix(".json")
+            for file_name in os.listdir(directory)
+            if file_name.endswith(".json")
+        }
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    async def get(self, key: str) -> Optional[BaseModel]:
+        if key not in self._keys:
+            self.misses += 1
+            return None
+
+        try:
+            async with aiofiles.open(self.path(key), mode="r") as file:
+                entry = json.loads(await file.read())
+            created_at = entry["created_at"]
+            outputs = (
+                None
+                if self.expired(created_at)
+                else self.model.model_validate(entry["outputs"])
+            )
+        except (OSError, ValueError, LookupError, TypeError):
+            # Missing, truncated or malformed entries are dropped like expired ones.
+            outputs = None
+
+        if outputs is None:
+            self._discard(key)
+            self.misses += 1
+            return None
+
+        os.utime(self.path(key))
+        self.hits += 1
+        return outputs
+
+    async def set(self, key: str, value: BaseModel) -> None:
+        entry = {
+            "created_at": time.time(),
+            "outputs": value.model_dump(mode="json", by_alias=True),
+        }
+        tmp_path = os.path.join(self.directory, f".{uuid4()}.tmp")
+        async with aiofiles.open(tmp_path, mode="w") as file:
+            await file.write(json.dumps(entry))
+        os.replace(tmp_path, self.path(key))
+        self._keys.add(key)
+
+        if len(self._keys) > self.max_size:
+            by_recency = sorted(
+                self._keys,
+                key=lambda cached: os.stat(self.path(cached)).st_mtime,
+            )
+            for stale in by_recency[: len(self._keys) - self.max_size]:
+                self._discard(stale)
+                self.evictions += 1
+
+    def _discard(self, key: str):
+        self._keys.discard(key)
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+@cache
+def sdk_version() -> str:
+    try:
+        return metadata.version("hyko_sdk")
+    except metadata.PackageNotFoundError:
+        # Source checkout, fingerprint the package files instead.
+        package = os.path.dirname(__file__)
+        files = sorted(
+            os.path.join(root, file_name)
+            for root, _, file_names in os.walk(package)
+            for file_name in file_names
+            if file_name.endswith(".py")
+        )
+        stats = [
+            (file, os.stat(file).st_mtime_ns, os.stat(file).st_size) for file in files
+        ]
+        return hashlib.sha256(repr(stats).encode()).hexdigest()
+
+
+def _describe_type(annotation: Any, seen: set[type]) -> Iterator[str]:
+    yield repr(annotation)
+    for arg in get_args(annotation):
+        yield from _describe_type(arg, seen)
+
+    if not isinstance(annotation, type) or annotation in seen:
+        return
+    seen.add(annotation)
+    if issubclass(annotation, BaseModel):
+        yield from _describe_model(annotation, seen)
+    elif issubclass(annotation, Enum):
+        yield repr([(member.name, member.value) for member in annotation])
+
+
+# Everything set on a field that can change its port metadata, besides its type.
+_field_attributes = (
+    "alias",
+    "validation_alias",
+    "serialization_alias",
+    "title",
+    "description",
+    "examples",
+    "default",
+    "default_factory",
+    "json_schema_extra",
+    "metadata",
+    "discriminator",
+    "deprecated",
+    "exclude",
+    "frozen",
+)
+
+
+def _describe_value(value: Any) -> str:
+    """Description of a field setting that is stable across processes.
+
+    Functions, e.g. `json_schema_extra` callables or validators in the field
+    metadata, are described by name and bytecode instead of their address.
+    """
+    if isinstance(value, list | tuple):
+        return "[" + ",".join(_describe_value(item) for item in value) + "]"  # type: ignore
+    if isinstance(value, dict):
+        items = sorted(
+            f"{_describe_value(key)}:{_describe_value(item)}"
+            for key, item in value.items()  # type: ignore
+        )
+        return "{" + ",".join(items) + "}"
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    if isinstance(value, CodeType):
+        return value.co_code.hex() + _describe_value((value.co_consts, value.co_names))
+    code = getattr(value, "__code__", None)
+    if code is not None:
+        return f"{value.__module__}.{value.__qualname__}:{_describe_value(code)}"
+    if dataclasses.is_dataclass(value):
+        return _describe_value(
+            (
+                type(value),
+                *(getattr(value, field.name) for field in dataclasses.fields(value)),
+            )
+        )
+    return repr(value)
+
+
+def _describe_model(model: Type[BaseModel], seen: set[type]) -> Iterator[str]:
+    yield f"{model.__module__}.{model.__qualname__}"
+    yield _describe_value(model.model_config)
+    for name, info in model.model_fields.items():
+        yield name
+        yield _describe_value(
+            [getattr(info, attribute, None) for attribute in _field_attributes]
+        )
+        yield from _describe_type(info.annotation, seen)
+
+
+def model_fingerprint(model: Type[BaseModel]) -> str:
+    """Hash of the fields of a model and every model and enum they refer to."""
+    key = hashlib.sha256()
+    for part in (sdk_version(), pydantic.VERSION, *_describe_model(model, set())):
+        key.update(part.encode())
+        key.update(b"\0")
+    return key.hexdigest()
+
+
+class MetadataCache:
+    """Opt-in disk cache of the port metadata generated for node models.
+
+    Entries are keyed by `model_fingerprint` and the SDK version, so warm
+    deploys load the metadata of unchanged models instead of generating their
+    JSON schemas. Enable it with `configure` or the `HYKO_METADATA_CACHE_DIR`
+    environment variable, before the modules defining nodes are imported.
+    """
+
+    directory: Optional[str] = os.environ.get("HYKO_METADATA_CACHE_DIR")
+
+    @classmethod
+    def configure(cls, directory: Optional[str]):
+        cls.directory = directory
+
+    @classmethod
+    def path(cls, model: Type[BaseModel], components: bool) -> Optional[str]:
+        if not cls.directory:
+            return None
+        key = model_fingerprint(model) + ("" if components else "-outputs")
+        return os.path.join(cls.directory, key + ".json")
+
+    @classmethod
+    def load(
+        cls, model: Type[BaseModel], components: bool
+    ) -> Optional[dict[str, FieldMetadata]]:
+        path = cls.path(model, components)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as file:
+                fields = json.loads(file.read())
+            return {
+                name: FieldMetadata.model_validate(field)
+                for name, field in fields.items()
+            }
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def save(
+        cls,
+        model: Type[BaseModel],
+        components: bool,
+        fields: dict[str, FieldMetadata],
+    ):
+        path = cls.path(model, components)
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = os.path.join(os.path.dirname(path), f".{uuid4()}.tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(
+                {
+                    name: field.model_dump(mode="json", by_alias=True)
+                    for name, field in fields.items()
+                },
+                file,
+            )
+        os.replace(tmp_path, path)
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+from .metrics import node_queue_wait_duration
+from .tracing import span
+
+
+class NodeOverloadedError(HTTPException):
+    """Raised when a node sheds load instead of queueing a call."""
+
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+        )
+
+
+class AdmissionStats(BaseModel):
+    max_concurrency: int
+    max_queue_size: Optional[int] = None
+    in_flight: int = 0
+    queue_depth: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    total_wait_time: float = 0
+    max_wait_time: float = 0
+
+
+class AdmissionController:
+    """Bounds the number of concurrent executions of a node.
+
+    Calls beyond `max_concurrency` wait in a FIFO queue of at most
+    `max_queue_size` entries for up to `queue_timeout` seconds. Calls that find
+    the queue full, or wait longer than the timeout, fail with
+    `NodeOverloadedError` so that the worker sheds load instead of piling up
+    work it cannot hold in memory.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue_size: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        name: str = "",
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if max_queue_size is not None and max_queue_size < 0:
+            raise ValueError("max_queue_size must not be negative")
+
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+        # Node label of the exported metrics
+        self.name = name
+
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> AdmissionStats:
+        return AdmissionStats(
+            max_concurrency=self.max_concurrency,
+            max_queue_size=self.max_queue_size,
+            in_flight=self.in_flight,
+            queue_depth=self.queue_depth,
+            admitted=self.admitted,
+            rejected=self.rejected,
+            timed_out=self.timed_out,
+            total_wait_time=self.total_wait_time,
+            max_wait_time=self.max_wait_time,
+        )
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if self.max_queue_size is not None and self.queue_depth >= self.max_queue_size:
+            self.rejected += 1
+            raise NodeOverloadedError(
+                f"node is at capacity ({self.in_flight} running, {self.queue_depth} queued)"
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                with span("queue"):
+                    await waiter
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over right before we gave up, pass it on.
+                self.release()
+            else:
+                waiter.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+            if isinstance(e, TimeoutError):
+                self.timed_out += 1
+                raise NodeOverloadedError(
+                    f"timed out after waiting {self.queue_timeout}s for a free slot"
+                ) from e
+            raise
+        finally:
+            self._record_wait(time.perf_counter() - start)
+
+        self.admitted += 1
+
+    def release(self) -> None:
+        # Hand the slot directly to the next waiter so that `in_flight` stays
+        # constant and no newcomer can jump the queue.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _record_wait(self, wait: float):
+        self.total_wait_time += wait
+        self.max_wait_time = max(self.max_wait_time, wait)
+        node_queue_wait_duration.observe(wait, node=self.name)
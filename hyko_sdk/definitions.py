@@ -1,23 +1,63 @@
+import asyncio
+import contextvars
+import hashlib
+import importlib
+import inspect
+import os
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
 from dataclasses import dataclass
-from typing import Any, Callable, Coroutine, Optional, Type, TypeVar
+from importlib.metadata import entry_points
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Callable,
+    Coroutine,
+    Optional,
+    Type,
+    TypeVar,
+)
 
-from pydantic import BaseModel
-from pydantic.json_schema import GenerateJsonSchema
+import orjson
+from fastapi.exceptions import RequestValidationError
+from pydantic import (
+    BaseModel,
+    Field,
+    ValidationError,
+    create_model,
+    field_validator,
+)
 
-from .json_schema import (
-    CustomJsonSchema,
-    JsonSchemaGenerator,
-    JsonSchemaGeneratorWithComponents,
+from .cache import DiskCache, MemoryCache, MetadataCache, ResultCache
+from .concurrency import AdmissionController
+from .io import UploadTracker, persist, upload_scope, uploads_deferred
+from .json_schema import PortSchema
+from .metrics import (
+    REGISTRY,
+    CollectedCounter,
+    Gauge,
+    node_call_duration,
+    node_calls,
+    node_in_flight,
+    node_startup_duration,
 )
 from .models import (
     CoreModel,
+    ExecutionMode,
     FieldMetadata,
     Icon,
     MetaDataBase,
     StorageConfig,
     SupportedProviders,
     Tag,
+    UploadMode,
 )
+from .pool import ProcessPool, ensure_module, run_in_worker
+from .profiling import Profiler
+from .storage import bind_storage_config, config_key, storage_scope
+from .tracing import span
 
 InputsType = TypeVar("InputsType", bound="BaseModel")
 ParamsType = TypeVar("ParamsType", bound="BaseModel")
@@ -27,29 +67,201 @@ OnStartupFuncType = Callable[[ParamsType], Coroutine[Any, Any, None]]
 OnShutdownFuncType = Callable[[], Coroutine[Any, Any, None]]
 OnExecuteFuncType = Callable[[InputsType, ParamsType], Coroutine[Any, Any, OutputsType]]
 OnCallType = Callable[..., Coroutine[Any, Any, OutputsType]]
+OnCallStreamType = Callable[..., AsyncIterator[OutputsType]]
 
 T = TypeVar("T", bound=Type[BaseModel])
 
 
+async def last(stream: AsyncIterator[OutputsType]) -> Optional[OutputsType]:
+    """Drain a stream of partial outputs and return the final one."""
+    outputs = None
+    async for item in stream:
+        outputs = item
+    return outputs
+
+
+class ManifestEntry(BaseModel):
+    """Node declared without importing the module that defines it."""
+
+    name: str
+    module: str
+    metadata: Optional[MetaDataBase] = None
+    callbacks: list[str] = []
+
+    def dump_metadata(self) -> str:
+        assert self.metadata
+        return self.metadata.model_dump_json(exclude_none=True)
+
+
+class Manifest(BaseModel):
+    nodes: list[ManifestEntry] = []
+
+
 class Registry:
     _registry: dict[str, "ToolkitNode"] = {}
     _callbacks_registry: dict[
         str, Callable[..., Coroutine[Any, Any, MetaDataBase]]
     ] = {}
+    # Declared nodes whose module is imported on first use, see `declare`
+    _declared: dict[str, ManifestEntry] = {}
+    # Metadata of every node serialized as one JSON array, see `dump_all_metadata`
+    _metadata_json: Optional[bytes] = None
 
     @classmethod
     def register(cls, name: str, definition: "ToolkitNode"):
         cls._registry[name] = definition
+        cls.invalidate_metadata()
+
+    @classmethod
+    def declare(
+        cls,
+        name: str,
+        module: str,
+        metadata: Optional[MetaDataBase] = None,
+        callbacks: Optional[list[str]] = None,
+    ):
+        """Declare a node defined in `module` without importing it yet.
+
+        The module is imported by the first `get_handler`, or `get_callback`
+        for one of `callbacks`. With prebuilt `metadata` the node is listed by
+        `get_all_metadata` while its module is still not imported.
+        """
+        cls._declared[name] = ManifestEntry(
+            name=name, module=module, metadata=metadata, callbacks=callbacks or []
+        )
+        cls.invalidate_metadata()
+
+    @classmethod
+    def load_manifest(cls, path: str):
+        """Declare every node of a manifest written by `write_manifest`."""
+        with open(path, "rb") as file:
+            manifest = Manifest.model_validate_json(file.read())
+        for entry in manifest.nodes:
+            cls._declared[entry.name] = entry
+        cls.invalidate_metadata()
+
+    @classmethod
+    def load_entry_points(cls, group: str = "hyko_sdk.nodes"):
+        """Declare nodes advertised by installed packages as `name = module`.
+
+        Entry points carry no metadata, listing these nodes imports them.
+        """
+        for entry_point in entry_points(group=group):
+            cls.declare(entry_point.name, entry_point.module)
+
+    @classmethod
+    def build_manifest(cls, modules: list[str]) -> Manifest:
+        """Import `modules` and describe the nodes and callbacks each one defines.
+
+        Meant to run at build time in a fresh process, the manifest lets
+        workers serve metadata and import only the nodes they are called for.
+        """
+        manifest = Manifest()
+        for module in modules:
+            nodes = set(cls._registry)
+            callbacks = set(cls._callbacks_registry)
+            importlib.import_module(module)
+            new_callbacks = [
+                id for id in cls._callbacks_registry if id not in callbacks
+            ]
+            for name, node in cls._registry.items():
+                if name in nodes:
+                    continue
+                manifest.nodes.append(
+                    ManifestEntry(
+                        name=name,
+                        module=module,
+                        metadata=node.get_metadata(),
+                        callbacks=[
+                            id for id in new_callbacks if id in node.callback_ids()
+                        ],
+                    )
+                )
+        return manifest
+
+    @classmethod
+    def write_manifest(cls, path: str, modules: list[str]):
+        manifest = cls.build_manifest(modules)
+        with open(path, "w") as file:
+            file.write(manifest.model_dump_json(exclude_none=True))
 
     @classmethod
     def get_handler(cls, name: str) -> "ToolkitNode":
+        if name not in cls._registry and name in cls._declared:
+            importlib.import_module(cls._declared[name].module)
         if name not in cls._registry:
             raise ValueError(f"handler {name} not found")
         return cls._registry[name]
 
+    @classmethod
+    def definitions(cls) -> list["ToolkitNode | ManifestEntry"]:
+        """Registered nodes followed by the declared ones not imported yet.
+
+        Declared nodes without prebuilt metadata are imported.
+        """
+        for name, entry in list(cls._declared.items()):
+            if entry.metadata is None and name not in cls._registry:
+                cls.get_handler(name)
+        return [
+            *cls._registry.values(),
+            *(
+                entry
+                for name, entry in cls._declared.items()
+                if name not in cls._registry
+            ),
+        ]
+
+    @classmethod
+    async def warmup(
+        cls,
+        names: list[str],
+        params: Optional[dict[str, dict[str, Any]]] = None,
+        max_concurrency: Optional[int] = 4,
+    ):
+        """Start and warm up nodes ahead of their first call.
+
+        `params` maps node names to their params, nodes missing from it use
+        the defaults of their params model. Up to `max_concurrency` nodes warm
+        up at once, the first failure cancels the others and is raised.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or len(names) or 1)
+
+        async def warmup(name: str):
+            node = cls.get_handler(name)
+            validated_params = node.validate_params((params or {}).get(name, {}))
+            async with semaphore:
+                await node.warmup(validated_params)
+
+        async with asyncio.TaskGroup() as group:
+            for name in names:
+                group.create_task(warmup(name))
+
     @classmethod
     def get_all_metadata(cls):
-        return [definition.get_metadata() for definition in cls._registry.values()]
+        return [
+            definition.get_metadata()
+            if isinstance(definition, ToolkitNode)
+            else definition.metadata
+            for definition in cls.definitions()
+        ]
+
+    @classmethod
+    def dump_all_metadata(cls) -> bytes:
+        """JSON array of the metadata of every node, built once and reused."""
+        if cls._metadata_json is None:
+            cls._metadata_json = (
+                b"["
+                + b",".join(
+                    definition.dump_metadata().encode()
+                    for definition in cls.definitions()
+                )
+                + b"]"
+            )
+        return cls._metadata_json
+
+    @classmethod
+    def invalidate_metadata(cls):
+        cls._metadata_json = None
 
     @classmethod
     def register_callback(
@@ -59,6 +271,11 @@ class Registry:
 
     @classmethod
     def get_callback(cls, id: str):
+        if id not in cls._callbacks_registry:
+            for entry in cls._declared.values():
+                if id in entry.callbacks:
+                    importlib.import_module(entry.module)
+                    break
         if id not in cls._callbacks_registry:
             raise ValueError(f"callback {id} not found")
         return cls._callbacks_registry[id]
@@ -77,6 +294,29 @@ class ToolkitNode:
     is_input: Optional[bool] = None
     is_group_node: Optional[bool] = None
 
+    # Admission control, unbounded unless max_concurrency is set
+    max_concurrency: Optional[int] = None
+    max_queue_size: Optional[int] = None
+    queue_timeout: Optional[float] = None
+
+    # Run the handler on the event loop or in the shared process pool
+    execution_mode: ExecutionMode = ExecutionMode.ASYNC
+
+    # Memoization of outputs for deterministic nodes
+    cacheable: bool = False
+    cache_size: int = 1024
+    cache_ttl: Optional[float] = None
+    cache_dir: Optional[str] = None
+
+    # Lazy uploads only store media that end up in the returned outputs,
+    # background uploads overlap storing early outputs with the handler
+    upload_mode: UploadMode = UploadMode.EAGER
+
+    # Validated params of recent calls, reused by calls with identical params.
+    # Hashing costs about as much as validating plain fields, enable it for
+    # params with expensive validators
+    params_cache_size: int = 0
+
     def __post_init__(
         self,
     ):
@@ -86,52 +326,76 @@ class ToolkitNode:
 
         self.inputs_model = CoreModel
         self.params_model = CoreModel
+        self.outputs_model = CoreModel
 
         self._call = None
 
         # For models
         self.started: bool = False
         self._startup = None
-
-        # Automatically register the instance upon creation
-        Registry.register(self.get_metadata().name, self)
-
-    def fields_to_metadata(
-        self,
-        model: Type[BaseModel],
-        schema_generator: type[GenerateJsonSchema] = JsonSchemaGeneratorWithComponents,
-    ):
-        schema = CustomJsonSchema.model_validate(
-            model.model_json_schema(
-                schema_generator=schema_generator,
-                ref_template="{model}",
+        self._warmup = None
+
+        self.admission = (
+            AdmissionController(
+                max_concurrency=self.max_concurrency,
+                max_queue_size=self.max_queue_size,
+                queue_timeout=self.queue_timeout,
+                name=self.name,
             )
+            if self.max_concurrency is not None
+            else None
         )
-        return {
-            field: FieldMetadata(
-                name=field,
-                **prop.model_dump(),
-            )
-            for field, prop in schema.properties.items()
-        }
+
+        self._cache: Optional[ResultCache] = None
+
+        # Built on first use, reset whenever inputs, outputs or params change
+        self._metadata: Optional[MetaDataBase] = None
+        self._metadata_json: Optional[str] = None
+        self._request_model: Optional[Type[BaseModel]] = None
+        self._params_cache: OrderedDict[bytes, BaseModel] = OrderedDict()
+
+        # Automatically register the instance upon creation
+        Registry.register(self.name, self)
+
+    def fields_to_metadata(self, model: Type[BaseModel], components: bool = True):
+        fields = MetadataCache.load(model, components)
+        if fields is None:
+            ports = PortSchema.from_model(model, components=components)
+            fields = {
+                field: FieldMetadata(name=field, **port)
+                for field, port in ports.fields().items()
+            }
+            MetadataCache.save(model, components, fields)
+        return fields
 
     def set_input(self, model: T) -> T:
         self.inputs = self.fields_to_metadata(model)
         self.inputs_model = model
+        self._request_model = None
+        self.invalidate_metadata()
         return model
 
     def set_output(self, model: T) -> T:
-        self.outputs = self.fields_to_metadata(
-            model, schema_generator=JsonSchemaGenerator
-        )
+        self.outputs = self.fields_to_metadata(model, components=False)
+        self.outputs_model = model
+        self._cache = None
+        self.invalidate_metadata()
         return model
 
     def set_param(self, model: T) -> T:
         self.params = self.fields_to_metadata(model)
         self.params_model = model
+        self._params_cache.clear()
+        self.invalidate_metadata()
         return model
 
-    def get_metadata(self):
+    def get_metadata(self) -> MetaDataBase:
+        """Metadata of the node, shared between calls and not to be modified."""
+        if self._metadata is None:
+            self._metadata = self.build_metadata()
+        return self._metadata
+
+    def build_metadata(self) -> MetaDataBase:
         return MetaDataBase(
             name=self.name,
             description=self.description,
@@ -148,12 +412,26 @@ class ToolkitNode:
             is_group_node=self.is_group_node,
         )
 
-    def on_call(self, f: OnCallType[...]):
+    def on_call(self, f: OnCallType[...] | OnCallStreamType[...]):
+        if self.outputs_model is CoreModel and (
+            self.cacheable or self.execution_mode == ExecutionMode.PROCESS
+        ):
+            # Cache hits and results of pool workers are rebuilt from their
+            # JSON form with the outputs model.
+            raise ValueError(f"node {self.name} needs set_output before on_call")
         self._call = f
+        if self.execution_mode == ExecutionMode.PROCESS:
+            ProcessPool.add_module(f.__module__)
 
     def dump_metadata(self) -> str:
-        metadata = self.get_metadata()
-        return metadata.model_dump_json(exclude_none=True)
+        if self._metadata_json is None:
+            self._metadata_json = self.get_metadata().model_dump_json(exclude_none=True)
+        return self._metadata_json
+
+    def invalidate_metadata(self):
+        self._metadata = None
+        self._metadata_json = None
+        Registry.invalidate_metadata()
 
     def on_startup(self, f: OnStartupFuncType[...]):
         self._startup = f
@@ -162,25 +440,357 @@ class ToolkitNode:
         if self.started or not self._startup:
             return
 
-        await self._startup(validated_params)
+        start = time.perf_counter()
+        with span("startup", node=self.name):
+            await self._startup(validated_params)
+        node_startup_duration.set(time.perf_counter() - start, node=self.name)
         self.started = True
 
+    def on_warmup(self, f: OnStartupFuncType[...]):
+        """Run after startup when the node is warmed up, e.g. a dummy inference."""
+        self._warmup = f
+
+    async def warmup(self, validated_params: Any):
+        """Start the node and run its warmup hook before it serves calls.
+
+        Process-mode nodes are warmed up once per pool worker, on a best
+        effort basis since the pool picks the worker running each task.
+        """
+        if self.execution_mode == ExecutionMode.PROCESS and self._call:
+            # Starting waits for every worker to fork and import its modules.
+            await asyncio.to_thread(ProcessPool.start)
+            await asyncio.gather(
+                *(
+                    ProcessPool.run(
+                        _warmup_in_worker,
+                        self._call.__module__,
+                        self.name,
+                        validated_params.model_dump(mode="json", by_alias=True),
+                    )
+                    for _ in range(ProcessPool.max_workers)
+                )
+            )
+            return
+
+        await self.startup(validated_params)
+        if self._warmup:
+            await self._warmup(validated_params)
+
+    @property
+    def streaming(self) -> bool:
+        """Whether the handler is an async generator yielding partial outputs."""
+        return inspect.isasyncgenfunction(self._call)
+
+    def validate(
+        self,
+        inputs: dict[str, Any],
+        params: dict[str, Any],
+        storage_config: StorageConfig,
+    ):
+        with storage_scope(storage_config), span("validate", node=self.name):
+            return self.inputs_model.model_validate(inputs), self.validate_params(
+                params
+            )
+
+    def validate_params(self, params: dict[str, Any]) -> BaseModel:
+        """Validated params, reused from a recent call with identical params.
+
+        With `params_cache_size` set, calls get a shallow copy of the cached
+        model, handlers can reassign fields but must not mutate nested values.
+        """
+        if not self.params_cache_size:
+            return self.params_model.model_validate(params)
+        try:
+            key = orjson.dumps(params, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            return self.params_model.model_validate(params)
+
+        validated = self._params_cache.get(key)
+        if validated is None:
+            validated = self.params_model.model_validate(params)
+            self._params_cache[key] = validated
+            if len(self._params_cache) > self.params_cache_size:
+                self._params_cache.popitem(last=False)
+        else:
+            self._params_cache.move_to_end(key)
+        return validated.model_copy()
+
+    @property
+    def request_model(self) -> Type[BaseModel]:
+        """Model of a call request body, inputs validated in the same pass.
+
+        Fields are validated in order, the storage config is bound before the
+        inputs so that media inputs use the caller's configuration.
+        """
+        if self._request_model is None:
+            self._request_model = create_model(
+                f"{self.inputs_model.__name__}Request",
+                storage_config=(StorageConfig, ...),
+                inputs=(self.inputs_model, Field(default={}, validate_default=True)),
+                params=(dict[str, Any], {}),
+                __validators__={
+                    "bind_storage": field_validator("storage_config")(_bind_storage)
+                },
+            )
+        return self._request_model
+
+    def validate_json(self, body: bytes | str):
+        """Validate a call request body straight from JSON.
+
+        Media ports are validated from their file name only, without trying
+        the Python object branch of their schema. Invalid bodies raise
+        `RequestValidationError`, answered with 422 by the executor, unlike
+        validation errors raised later by the handler.
+        """
+        with span("validate", node=self.name):
+            try:
+                # Bound in a copy of the context, the caller's is left untouched.
+                request = contextvars.copy_context().run(
+                    self.request_model.model_validate_json, body
+                )
+                params = self.validate_params(request.params)
+            except ValidationError as e:
+                raise RequestValidationError(
+                    e.errors(include_url=False, include_context=False)
+                ) from e
+            return request.inputs, params, request.storage_config
+
+    def profiling(self) -> AsyncContextManager[None]:
+        """Profile a call of this node when the `Profiler` is enabled."""
+        return Profiler.profile(self.name) if Profiler.directory else nullcontext()
+
     async def call(
         self,
         inputs: dict[str, Any],
         params: dict[str, Any],
         storage_config: StorageConfig,
     ):
-        StorageConfig.configure(**storage_config.model_dump())
-        validated_inputs = self.inputs_model(**inputs)
-        validated_params = self.params_model(**params)
+        async with self.profiling():
+            with span("call", node=self.name):
+                validated_inputs, validated_params = self.validate(
+                    inputs, params, storage_config
+                )
+                return await self.run(
+                    validated_inputs, validated_params, storage_config
+                )
+
+    async def call_json(self, body: bytes | str):
+        """Like `call`, for a JSON request body with inputs, params and storage_config."""
+        async with self.profiling():
+            with span("call", node=self.name):
+                validated_inputs, validated_params, storage_config = self.validate_json(
+                    body
+                )
+                return await self.run(
+                    validated_inputs, validated_params, storage_config
+                )
+
+    async def call_stream(
+        self,
+        inputs: dict[str, Any],
+        params: dict[str, Any],
+        storage_config: StorageConfig,
+    ) -> AsyncIterator[Any]:
+        """Like `call`, but yields every partial output of a streaming handler.
+
+        Handlers returning a single value yield it once, the last item is the
+        final output in every case.
+        """
+        async with self.profiling():
+            validated_inputs, validated_params = self.validate(
+                inputs, params, storage_config
+            )
+            async for outputs in self.run_stream(
+                validated_inputs, validated_params, storage_config
+            ):
+                yield outputs
+
+    async def run(
+        self,
+        validated_inputs: BaseModel,
+        validated_params: BaseModel,
+        storage_config: StorageConfig,
+    ):
+        return await last(
+            self.run_stream(validated_inputs, validated_params, storage_config)
+        )
+
+    async def run_stream(
+        self,
+        validated_inputs: BaseModel,
+        validated_params: BaseModel,
+        storage_config: StorageConfig,
+    ) -> AsyncIterator[Any]:
+        start = time.perf_counter()
+        node_in_flight.inc(node=self.name)
+        status = "error"
+        stream = self._run_stream(validated_inputs, validated_params, storage_config)
+        try:
+            while True:
+                # Scoped to each step, concurrent calls keep their own storage.
+                with storage_scope(storage_config):
+                    try:
+                        outputs = await anext(stream)
+                    except StopAsyncIteration:
+                        break
+                yield outputs
+            status = "ok"
+        except (GeneratorExit, asyncio.CancelledError):
+            status = "cancelled"
+            raise
+        finally:
+            await stream.aclose()
+            node_in_flight.dec(node=self.name)
+            node_calls.inc(node=self.name, status=status)
+            node_call_duration.observe(time.perf_counter() - start, node=self.name)
+
+    async def _run_stream(
+        self,
+        validated_inputs: BaseModel,
+        validated_params: BaseModel,
+        storage_config: StorageConfig,
+    ) -> AsyncIterator[Any]:
+        cache = self.cache
+        if cache is not None:
+            key = self.cache_key(validated_inputs, validated_params)
+            with span("cache", node=self.name):
+                cached = await cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        async with self.admission.slot() if self.admission else nullcontext():
+            if self.execution_mode == ExecutionMode.PROCESS and self._call:
+                with span("pool", node=self.name):
+                    # Workers read media from storage, including media a flow
+                    # kept in memory so far.
+                    await persist(validated_inputs)
+                    outputs = await self.execute_in_pool(
+                        validated_inputs, validated_params, storage_config
+                    )
+                yield outputs
+            else:
+                async for outputs in self.execute_stream(
+                    validated_inputs, validated_params
+                ):
+                    # Media kept in memory by the handler are stored before
+                    # leaving the node, unless a flow keeps passing them on.
+                    if not uploads_deferred():
+                        with span("persist", node=self.name):
+                            await persist(outputs)
+                    yield outputs
+
+        # Outputs holding deferred uploads are only valid inside their flow.
+        if cache is not None and not uploads_deferred():
+            with span("cache", node=self.name):
+                await cache.set(key, outputs)
+
+    @property
+    def cache(self) -> Optional[ResultCache]:
+        if self.cacheable and self._cache is None:
+            if self.cache_dir:
+                # Nodes sharing a directory each get their own subdirectory.
+                self._cache = DiskCache(
+                    directory=os.path.join(
+                        self.cache_dir,
+                        hashlib.sha256(self.name.encode()).hexdigest()[:16],
+                    ),
+                    model=self.outputs_model,
+                    max_size=self.cache_size,
+                    ttl=self.cache_ttl,
+                )
+            else:
+                self._cache = MemoryCache(
+                    model=self.outputs_model,
+                    max_size=self.cache_size,
+                    ttl=self.cache_ttl,
+                )
+        return self._cache
+
+    def cache_key(self, validated_inputs: BaseModel, validated_params: BaseModel):
+        """Hash of everything that determines the outputs of a deterministic node.
+
+        Media are part of the key through their file names, storage objects are
+        immutable so the same name always refers to the same content. The
+        storage credentials are part of it too, outputs refer to files stored
+        for the caller and are only served again to the same user.
+        """
+        key = hashlib.sha256()
+        for part in (
+            self.name,
+            *config_key(),
+            validated_inputs.model_dump_json(by_alias=True),
+            validated_params.model_dump_json(by_alias=True),
+        ):
+            key.update(part.encode())
+            key.update(b"\0")
+        return key.hexdigest()
 
+    async def execute(self, validated_inputs: Any, validated_params: Any):
+        return await last(self.execute_stream(validated_inputs, validated_params))
+
+    async def execute_stream(
+        self, validated_inputs: Any, validated_params: Any
+    ) -> AsyncIterator[Any]:
         await self.startup(validated_params)
 
-        if self._call:
-            return await self._call(validated_inputs, validated_params)
-        else:
-            return CoreModel()
+        if not self._call:
+            yield CoreModel()
+            return
+
+        uploads = UploadTracker()
+        try:
+            if self.streaming:
+                stream = self._call(validated_inputs, validated_params)
+                while True:
+                    # Scoped to each step so that it never leaks to the consumer.
+                    with (
+                        upload_scope(self.upload_mode, uploads),
+                        span("handler", node=self.name),
+                    ):
+                        try:
+                            outputs = await anext(stream)
+                        except StopAsyncIteration:
+                            break
+                    await uploads.wait()
+                    yield outputs
+            else:
+                with (
+                    upload_scope(self.upload_mode, uploads),
+                    span("handler", node=self.name),
+                ):
+                    outputs = await self._call(validated_inputs, validated_params)
+                await uploads.wait()
+                yield outputs
+        finally:
+            uploads.cancel()
+
+    async def execute_in_pool(
+        self,
+        validated_inputs: BaseModel,
+        validated_params: BaseModel,
+        storage_config: StorageConfig,
+    ):
+        """Run the handler in a pool worker.
+
+        Only JSON values cross the process boundary, media are passed by their
+        storage file names and outputs are rebuilt with the outputs model.
+        """
+        assert self._call
+        outputs = await ProcessPool.run(
+            _execute_in_worker,
+            self._call.__module__,
+            self.name,
+            validated_inputs.model_dump(mode="json", by_alias=True),
+            validated_params.model_dump(mode="json", by_alias=True),
+            storage_config.model_dump(),
+        )
+        return self.outputs_model.model_validate(outputs)
+
+    def callback_ids(self) -> set[str]:
+        return {
+            field.callback_id for field in self.params.values() if field.callback_id
+        }
 
     def callback(self, trigger: str | list[str], id: str):
         if isinstance(trigger, list):
@@ -192,6 +802,7 @@ class ToolkitNode:
             field = self.params.get(trigger)
             assert field, "trigger field not found in params"
             field.callback_id = id
+        self.invalidate_metadata()
 
         def wrapper(
             callback: Callable[..., Coroutine[Any, Any, MetaDataBase]],
@@ -200,3 +811,101 @@ class ToolkitNode:
             return callback
 
         return wrapper
+
+
+def _cache_samples(attribute: str) -> dict[tuple[str, ...], float]:
+    return {
+        (name,): getattr(node._cache, attribute)
+        for name, node in Registry._registry.items()
+        if node._cache is not None
+    }
+
+
+REGISTRY.register(
+    CollectedCounter(
+        "hyko_node_cache_hits_total",
+        "Calls answered from the result cache of a node.",
+        ("node",),
+        collect=lambda: _cache_samples("hits"),
+    )
+)
+REGISTRY.register(
+    CollectedCounter(
+        "hyko_node_cache_misses_total",
+        "Calls of a cacheable node that missed its result cache.",
+        ("node",),
+        collect=lambda: _cache_samples("misses"),
+    )
+)
+
+
+def _admission_samples(attribute: str) -> dict[tuple[str, ...], float]:
+    return {
+        (name,): getattr(node.admission, attribute)
+        for name, node in Registry._registry.items()
+        if node.admission is not None
+    }
+
+
+REGISTRY.register(
+    Gauge(
+        "hyko_node_queue_depth",
+        "Calls waiting for an admission slot per node.",
+        ("node",),
+        collect=lambda: _admission_samples("queue_depth"),
+    )
+)
+REGISTRY.register(
+    CollectedCounter(
+        "hyko_node_admission_rejected_total",
+        "Calls rejected because the admission queue of a node was full.",
+        ("node",),
+        collect=lambda: _admission_samples("rejected"),
+    )
+)
+REGISTRY.register(
+    CollectedCounter(
+        "hyko_node_admission_timed_out_total",
+        "Calls that waited longer than the queue timeout of a node.",
+        ("node",),
+        collect=lambda: _admission_samples("timed_out"),
+    )
+)
+
+
+def _bind_storage(cls: Any, storage_config: StorageConfig) -> StorageConfig:
+    bind_storage_config(storage_config)
+    return storage_config
+
+
+def _warmup_in_worker(module: str, name: str, params: dict[str, Any]):
+    ensure_module(module)
+    node = Registry.get_handler(name)
+    validated_params = node.params_model(**params)
+
+    async def warmup():
+        await node.startup(validated_params)
+        if node._warmup:
+            await node._warmup(validated_params)
+
+    run_in_worker(warmup())
+
+
+def _execute_in_worker(
+    module: str,
+    name: str,
+    inputs: dict[str, Any],
+    params: dict[str, Any],
+    storage_config: dict[str, Any],
+) -> dict[str, Any]:
+    ensure_module(module)
+    node = Registry.get_handler(name)
+
+    with storage_scope(StorageConfig(**storage_config)):
+        outputs = run_in_worker(
+            node.execute(
+                node.inputs_model.model_validate(inputs), node.validate_params(params)
+            )
+        )
+        run_in_worker(persist(outputs))
+        return outputs.model_dump(mode="json", by_alias=True)
@@ -0,0 +1,164 @@
+import asyncio
+from typing import Any, Optional
+
+from pydantic import BaseModel, model_validator
+
+from .definitions import Registry
+from .io import defer_uploads, persist
+from .models import CoreModel, StorageConfig
+from .storage import storage_scope
+
+
+class FlowNode(BaseModel):
+    id: str
+    name: str
+    inputs: dict[str, Any] = {}
+    params: dict[str, Any] = {}
+
+
+class Edge(BaseModel):
+    source: str
+    source_output: str
+    target: str
+    target_input: str
+
+
+class Flow(BaseModel):
+    """Graph of registered nodes, edges connect an output to an input."""
+
+    nodes: list[FlowNode]
+    edges: list[Edge] = []
+
+    @model_validator(mode="after")
+    def check_graph(self):
+        ids = [node.id for node in self.nodes]
+        assert len(ids) == len(set(ids)), "flow node ids must be unique"
+        for edge in self.edges:
+            assert edge.source in ids, f"edge source {edge.source} not found"
+            assert edge.target in ids, f"edge target {edge.target} not found"
+
+        # Kahn's algorithm, every node is reached only if the graph is acyclic
+        dependencies = self.dependencies()
+        ready = [id for id in ids if not dependencies[id]]
+        visited = 0
+        while ready:
+            id = ready.pop()
+            visited += 1
+            for dependent in self.dependents(id):
+                dependencies[dependent].discard(id)
+                if not dependencies[dependent]:
+                    ready.append(dependent)
+        assert visited == len(ids), "flow must not contain cycles"
+        return self
+
+    def dependencies(self) -> dict[str, set[str]]:
+        dependencies: dict[str, set[str]] = {node.id: set() for node in self.nodes}
+        for edge in self.edges:
+            dependencies[edge.target].add(edge.source)
+        return dependencies
+
+    def dependents(self, id: str) -> set[str]:
+        return {edge.target for edge in self.edges if edge.source == id}
+
+    def check_ports(self):
+        """Check that every node is registered and that edges connect its ports.
+
+        Nodes without an outputs or inputs model accept any port name. Raises
+        `ValueError`, run before scheduling so that nothing runs in vain.
+        """
+        handlers = {node.id: Registry.get_handler(node.name) for node in self.nodes}
+        for edge in self.edges:
+            outputs_model = handlers[edge.source].outputs_model
+            if (
+                outputs_model is not CoreModel
+                and edge.source_output not in outputs_model.model_fields
+            ):
+                raise ValueError(
+                    f"flow node {edge.source} has no output {edge.source_output}"
+                )
+            inputs_model = handlers[edge.target].inputs_model
+            if (
+                inputs_model is not CoreModel
+                and edge.target_input not in inputs_model.model_fields
+            ):
+                raise ValueError(
+                    f"flow node {edge.target} has no input {edge.target_input}"
+                )
+
+    def sinks(self) -> list[str]:
+        sources = {edge.source for edge in self.edges}
+        return [node.id for node in self.nodes if node.id not in sources]
+
+
+async def run_flow(
+    flow: Flow,
+    storage_config: StorageConfig,
+    outputs: Optional[list[str]] = None,
+) -> dict[str, Any]:
+    """Run a flow in-process and return the outputs of its boundary nodes.
+
+    Ready nodes run concurrently. Values travel along edges as Python objects,
+    so media produced by a node keep their data in memory and are neither
+    uploaded nor downloaded again by the next node. Uploads are deferred until
+    the flow finishes, and only media reachable from the returned outputs, the
+    sink nodes unless `outputs` lists node ids, are persisted to storage.
+    """
+    flow.check_ports()
+    with storage_scope(storage_config):
+        return await _run_flow(flow, storage_config, outputs)
+
+
+async def _run_flow(
+    flow: Flow,
+    storage_config: StorageConfig,
+    outputs: Optional[list[str]] = None,
+) -> dict[str, Any]:
+    nodes = {node.id: node for node in flow.nodes}
+    dependencies = flow.dependencies()
+    inputs = {node.id: dict(node.inputs) for node in flow.nodes}
+    results: dict[str, Any] = {}
+
+    async def run_node(id: str):
+        node = nodes[id]
+        handler = Registry.get_handler(node.name)
+        try:
+            validated_inputs = handler.inputs_model.model_validate(inputs[id])
+            validated_params = handler.validate_params(node.params)
+            return await handler.run(validated_inputs, validated_params, storage_config)
+        except Exception as e:
+            e.add_note(f"while running flow node {id} ({node.name})")
+            raise
+
+    with defer_uploads():
+        running: dict[asyncio.Task[Any], str] = {
+            asyncio.create_task(run_node(id)): id
+            for id, sources in dependencies.items()
+            if not sources
+        }
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    id = running.pop(task)
+                    results[id] = task.result()
+
+                    for edge in flow.edges:
+                        if edge.source != id:
+                            continue
+                        inputs[edge.target][edge.target_input] = getattr(
+                            results[id], edge.source_output
+                        )
+                        dependencies[edge.target].discard(id)
+                        if not dependencies[edge.target]:
+                            running[asyncio.create_task(run_node(edge.target))] = (
+                                edge.target
+                            )
+        finally:
+            for task in running:
+                task.cancel()
+
+    boundary = {id: results[id] for id in outputs or flow.sinks()}
+    await persist(list(boundary.values()))
+    return boundary
@@ -1,27 +1,166 @@
 import asyncio
 import io
 import os
-from typing import Any, Optional, Self
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, ClassVar, Optional, Self
 from uuid import UUID, uuid4
 
 import aiofiles
 import httpx
 import numpy as np
 import soundfile  # type: ignore
-from fastapi import HTTPException, status
 from numpy.typing import NDArray
 from PIL import Image as PIL_Image
-from pydantic import GetCoreSchemaHandler, GetJsonSchemaHandler
+from pydantic import BaseModel, GetCoreSchemaHandler, GetJsonSchemaHandler
 from pydantic.json_schema import JsonSchemaValue
 from pydantic_core import core_schema
 
 from .components.components import Ext
-from .models import StorageConfig
-from .utils import extension_to_mimetype
+from .metrics import (
+    codec_duration,
+    storage_deduplicated_bytes,
+    storage_read_bytes,
+    storage_written_bytes,
+)
+from .models import UploadMode
+from .storage import (
+    ConfigKey,
+    StorageBackend,
+    config_key,
+    content_digest,
+    content_index,
+    data_cache,
+    get_backend,
+    get_client,
+)
+from .tracing import span
+
+# Set while running a flow, media created inside are kept in memory and only
+# uploaded when `persist` is awaited at the flow boundary.
+_defer_uploads: ContextVar[bool] = ContextVar("defer_uploads", default=False)
+
+
+@contextmanager
+def defer_uploads():
+    token = _defer_uploads.set(True)
+    try:
+        yield
+    finally:
+        _defer_uploads.reset(token)
+
+
+def uploads_deferred() -> bool:
+    return _defer_uploads.get()
+
+
+class UploadTracker:
+    """Background uploads started while running a single call."""
+
+    def __init__(self):
+        self.tasks: set[asyncio.Task[None]] = set()
+
+    def track(self, task: asyncio.Task[None]):
+        self.tasks.add(task)
+
+    async def wait(self):
+        """Wait for every upload started so far, raising the first failure."""
+        while self.tasks:
+            tasks = list(self.tasks)
+            self.tasks.clear()
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+
+    def cancel(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks.clear()
+
+
+_upload_mode: ContextVar[UploadMode] = ContextVar(
+    "upload_mode", default=UploadMode.EAGER
+)
+_upload_tracker: ContextVar[Optional[UploadTracker]] = ContextVar(
+    "upload_tracker", default=None
+)
+
+
+@contextmanager
+def upload_scope(mode: UploadMode, tracker: Optional[UploadTracker] = None):
+    """Choose how media created in this scope are stored.
+
+    Background uploads need a `tracker` owned by the current call, without one
+    they fall back to eager uploads.
+    """
+    mode_token = _upload_mode.set(mode)
+    tracker_token = _upload_tracker.set(tracker)
+    try:
+        yield
+    finally:
+        _upload_mode.reset(mode_token)
+        _upload_tracker.reset(tracker_token)
+
+
+# Canonical storage file name: "<uuid>[_<suffix>].<ext>". Names that do not
+# match are checked the slow way, which accepts every form `UUID` parses.
+_file_name_pattern = re.compile(
+    r"(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|[0-9a-fA-F]{32})(?:_.*)?\.([^./]*)",
+    re.DOTALL,
+)
+_extensions = {ext.value: ext for ext in Ext}
+
+# Hashing releases the GIL, large files are hashed off the event loop.
+_hash_in_thread_above = 1024 * 1024
+
+
+class MediaState:
+    """Data of a media object beyond its file name, created on first use."""
+
+    __slots__ = ("cached_value", "decoded", "pending", "producer", "upload")
+
+    def __init__(self):
+        self.cached_value: Optional[bytes] = None
+        # In-memory representation (array, PIL image...) handed between nodes
+        # so that chained media nodes decode and encode only once.
+        self.decoded: Any = None
+        # Whether the data only lives in memory and still has to be uploaded.
+        self.pending = False
+        # Called for the file data of a lazy value when it is first needed.
+        self.producer: Optional[Callable[[], bytes]] = None
+        # Background upload of a pending value, see `save_in_background`.
+        self.upload: Optional[asyncio.Task[None]] = None
+
+
+def _state_attribute(name: str) -> Any:
+    def get(self: "HykoBaseType") -> Any:
+        return getattr(self._state, name) if self._state is not None else None
+
+    def set(self: "HykoBaseType", value: Any):
+        setattr(self.state, name, value)
+
+    return property(get, set)
 
 
 class HykoBaseType:
+    """Handle on a file in hyko storage.
+
+    A validated port value only holds its file name and the storage
+    configuration current when it was created, which it is read and stored
+    with. Everything else lives in a `MediaState` created when the data is
+    first touched, and the client and downloaded data are shared through
+    `hyko_sdk.storage`.
+    """
+
+    __slots__ = ("file_name", "_state", "_config")
+
     file_name: str
+    supported_ext: ClassVar[frozenset[str]] = frozenset()
 
     def __init__(
         self,
@@ -33,60 +172,256 @@ class HykoBaseType:
             file_name = str(obj_id) + "." + obj_ext.value
 
         self.file_name = file_name
-        self.cached_value = None
-
-        self.client = httpx.AsyncClient(
-            base_url=StorageConfig.host,
-            verify=False,
-            cookies={
-                "access_token": f"Bearer {StorageConfig.access_token}",
-                "refresh_token": f"Bearer {StorageConfig.refresh_token}",
-            },
-            timeout=10,
-        )
+        self._state: Optional[MediaState] = None
+        self._config: ConfigKey = config_key()
 
-    @staticmethod
-    def validate_object(val: Any) -> Any: ...
+    @property
+    def state(self) -> MediaState:
+        if self._state is None:
+            self._state = MediaState()
+        return self._state
 
-    @staticmethod
-    def validate_file_name(file_name: str) -> Any: ...
+    cached_value = _state_attribute("cached_value")
+    decoded = _state_attribute("decoded")
+    producer = _state_attribute("producer")
+    upload = _state_attribute("upload")
+
+    @property
+    def pending(self) -> bool:
+        return self._state is not None and self._state.pending
+
+    @pending.setter
+    def pending(self, pending: bool):
+        self.state.pending = pending
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return get_client(self._config)
+
+    @classmethod
+    def check_file_name(cls, file_name: str) -> Ext:
+        """Check that a storage file name fits this type, returns its extension."""
+        match = _file_name_pattern.fullmatch(file_name)
+        if match:
+            ext = match.group(1)
+        else:
+            obj_id, ext = os.path.splitext(file_name)
+            UUID(obj_id.split("_")[0])
+            ext = ext.lstrip(".")
+
+        if ext not in cls.supported_ext:
+            Ext(ext)
+            raise ValueError(f"Invalid file extension for {cls.__name__} error")
+        return _extensions[ext]
+
+    @classmethod
+    def validate_object(cls, val: Any) -> Any:
+        obj_ext = cls.check_file_name(val.file_name)
+        if isinstance(val, cls):
+            return val
+        return cls(obj_ext=obj_ext, file_name=val.file_name)
+
+    @classmethod
+    def validate_file_name(cls, file_name: str) -> Any:
+        return cls(obj_ext=cls.check_file_name(file_name), file_name=file_name)
 
     def get_name(self) -> str:
+        # Serializing a value that only lives in memory stores it first, calls
+        # and flows persist their outputs beforehand so this rarely blocks.
+        if self.pending and not uploads_deferred():
+            if self.upload is not None:
+                if not self.upload.done():
+                    raise RuntimeError(
+                        f"{self.file_name} is still uploading, await persist() first"
+                    )
+                self.upload.result()
+            self.persist_sync()
         return self.file_name
 
-    async def save(self, obj_data: bytes) -> None:
-        """Save data to hyko storage."""
-        _, ext = os.path.splitext(self.file_name)
+    def encode(self) -> bytes:
+        """Encode `decoded` into the file format.
+
+        Types without a codec of their own keep the file data as is.
+        """
+        return bytes(self.decoded)
 
-        file_tuple = (self.file_name, obj_data, extension_to_mimetype[ext.lstrip(".")])
+    @property
+    def storage(self) -> StorageBackend:
+        return get_backend(self._config)
 
-        res = await self.client.post(url="/storage/", files={"file": file_tuple})
-        if not res.is_success:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"failed to write to storage. {res.text}",
-            )
-        self.file_name = res.json()
+    def on_saved(self, file_name: str):
+        self.file_name = file_name
+        if self.cached_value is not None:
+            data_cache.set(self.file_name, self.cached_value, self._config)
+
+    def indexed_duplicate(self, digest: str, ext: str) -> Optional[str]:
+        """File stored earlier by this process with the same content, if any."""
+        file_name = content_index.get(digest, ext, self._config)
+        if file_name is not None and not self.storage.exists(file_name):
+            return None
+        return file_name
+
+    def stored_duplicate(self, file_name: Optional[str], size: int) -> bool:
+        """Reuse a stored file with the same content, if one was found."""
+        if file_name is None:
+            return False
+        self.on_saved(file_name)
+        storage_deduplicated_bytes.inc(size)
+        return True
+
+    async def save(self, obj_data: bytes) -> None:
+        """Save data to hyko storage, unless identical content already is."""
+        ext = os.path.splitext(self.file_name)[1]
+        if len(obj_data) > _hash_in_thread_above:
+            digest = await asyncio.to_thread(content_digest, obj_data)
+        else:
+            digest = content_digest(obj_data)
+        if self.stored_duplicate(self.indexed_duplicate(digest, ext), len(obj_data)):
+            return
+
+        with span("storage.upload", file_name=self.file_name, bytes=len(obj_data)):
+            file_name = await self.storage.lookup(digest, ext)
+            if file_name is not None:
+                content_index.set(digest, ext, file_name, self._config)
+                self.stored_duplicate(file_name, len(obj_data))
+                return
+            file_name = await self.storage.write(self.file_name, obj_data, digest)
+        self.on_saved(file_name)
+        content_index.set(digest, ext, file_name, self._config)
+        storage_written_bytes.inc(len(obj_data))
 
     async def init_from_val(self, val: bytes):
         self.cached_value = val
-        await self.save(val)
+        return await self.store_new_value()
+
+    async def init_from_producer(self, producer: Callable[[], bytes]):
+        """Defer both producing the file data and its upload until needed.
+
+        Values that are never serialized or read never call `producer`.
+        """
+        self.producer = producer
+        self.pending = True
+        return self
+
+    async def init_from_decoded(self, decoded: Any):
+        """Keep a decoded value in memory so that chained nodes skip decoding it.
+
+        It is stored like `init_from_val` data: right away in eager mode, so
+        that `file_name` names the stored file, and encoded only once needed
+        in flows and in lazy or background mode.
+        """
+        self.decoded = decoded
+        return await self.store_new_value()
+
+    async def store_new_value(self) -> Self:
+        """Store a new value as the upload mode of the current scope asks."""
+        mode = _upload_mode.get()
+        if uploads_deferred() or mode == UploadMode.LAZY:
+            self.pending = True
+        elif mode == UploadMode.BACKGROUND and _upload_tracker.get():
+            self.pending = True
+            self.save_in_background()
+        elif self.cached_value is not None:
+            await self.save(self.cached_value)
+        else:
+            await self.save(await asyncio.to_thread(self.produce))
         return self
 
+    def save_in_background(self) -> None:
+        """Start encoding and uploading a pending value without waiting for it.
+
+        The upload is tracked by the current call, which waits for it before
+        returning. Outside of a call the value stays pending.
+        """
+        tracker = _upload_tracker.get()
+        if not self.pending or self.upload is not None or tracker is None:
+            return
+
+        async def upload():
+            # Encoding runs in a thread so that it overlaps with the handler.
+            data = self.cached_value or await asyncio.to_thread(self.produce)
+            await self.save(data)
+            self.pending = False
+
+        self.upload = asyncio.create_task(upload())
+        tracker.track(self.upload)
+
+    async def persist(self) -> None:
+        """Upload data whose upload was deferred, no-op if already stored."""
+        if self.upload is not None:
+            await self.upload
+        elif self.pending:
+            await self.save(await self.get_data())
+            self.pending = False
+
+    def persist_sync(self) -> None:
+        obj_data = self.produce()
+        ext = os.path.splitext(self.file_name)[1]
+        digest = content_digest(obj_data)
+        if not self.stored_duplicate(
+            self.indexed_duplicate(digest, ext), len(obj_data)
+        ):
+            with span("storage.upload", file_name=self.file_name, bytes=len(obj_data)):
+                file_name = self.storage.write_sync(self.file_name, obj_data, digest)
+            self.on_saved(file_name)
+            content_index.set(digest, ext, file_name, self._config)
+            storage_written_bytes.inc(len(obj_data))
+        self.pending = False
+
+    async def decode(self) -> Any:
+        """Decoded representation, decoding the stored data at most once."""
+        if self.decoded is None:
+            data = await self.get_view()
+            with (
+                span("decode", type=type(self).__name__),
+                codec_duration.time(operation="decode", type=type(self).__name__),
+            ):
+                self.decoded = self.decode_data(data)
+        return self.decoded
+
+    def decode_data(self, data: bytes | memoryview) -> Any:
+        return bytes(data)
+
+    def produce(self) -> bytes:
+        """File data of a value that only lives in memory."""
+        if self.cached_value is None:
+            with (
+                span("encode", type=type(self).__name__),
+                codec_duration.time(operation="encode", type=type(self).__name__),
+            ):
+                self.cached_value = self.producer() if self.producer else self.encode()
+            self.producer = None
+        return self.cached_value
+
     async def get_data(self) -> bytes:
         """Get data from hyko storage, use cached value if possible."""
-        if not self.cached_value:
-            res = await self.client.get(url=f"/storage/{self.file_name}")
-
-            if not res.is_success:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"failed to read from storage. {res.text}",
-                )
-            self.cached_value = res.content
+        if self.pending:
+            return self.produce()
+
+        if self.cached_value is None:
+            data = data_cache.get(self.file_name, self._config)
+            if data is None:
+                with span("storage.download", file_name=self.file_name):
+                    data = await self.storage.read(self.file_name)
+                storage_read_bytes.inc(len(data))
+                data_cache.set(self.file_name, data, self._config)
+            self.cached_value = data
 
         return self.cached_value
 
+    async def get_view(self) -> memoryview:
+        """Read-only view of the data, mapped from local storage without a copy.
+
+        Views of mapped files are not kept in the shared data cache.
+        """
+        if not self.pending and self.cached_value is None:
+            # Mapping is immediate, pages are read as the view is accessed.
+            view = await self.storage.read_view(self.file_name)
+            if view is not None:
+                storage_read_bytes.inc(len(view))
+                return view
+        return memoryview(await self.get_data())
+
     @classmethod
     def __get_pydantic_json_schema__(
         cls, core_schema: core_schema.CoreSchema, handler: GetJsonSchemaHandler
@@ -128,37 +463,11 @@ class HykoBaseType:
 
 
 class Image(HykoBaseType):
-    @staticmethod
-    def validate_object(val: "Image"):
-        file_name = val.file_name
-        obj_id, obj_ext = os.path.splitext(file_name)
-        obj_id = UUID(obj_id.split("_")[0])
-        obj_ext = Ext(obj_ext.lstrip("."))
-        assert obj_ext.value in [
-            Ext.PNG,
-            Ext.JPEG,
-            Ext.MPEG,
-            Ext.TIFF,
-            Ext.TIF,
-            Ext.BMP,
-            Ext.JP2,
-            Ext.DIB,
-            Ext.PGM,
-            Ext.PPM,
-            Ext.PNM,
-            Ext.RAS,
-            Ext.HDR,
-            Ext.WEBP,
-            Ext.JPG,
-        ], "Invalid file extension for Image error"
-        return Image(obj_ext=obj_ext, file_name=file_name)
+    __slots__ = ()
 
-    @staticmethod
-    def validate_file_name(file_name: str):
-        obj_id, obj_ext = os.path.splitext(file_name)
-        obj_id = UUID(obj_id.split("_")[0])
-        obj_ext = Ext(obj_ext.lstrip("."))
-        assert obj_ext.value in [
+    supported_ext = frozenset(
+        ext.value
+        for ext in (
             Ext.PNG,
             Ext.JPEG,
             Ext.MPEG,
@@ -174,90 +483,82 @@ class Image(HykoBaseType):
             Ext.HDR,
             Ext.WEBP,
             Ext.JPG,
-        ], "Invalid file extension for Image error"
-        return Image(obj_ext=obj_ext, file_name=file_name)
+        )
+    )
+
+    def encode(self) -> bytes:
+        img = self.decoded
+        if not isinstance(img, PIL_Image.Image):
+            img = PIL_Image.fromarray(img)  # type: ignore
+
+        file = io.BytesIO()
+        img.save(file, format=self.encoding.value)  # type: ignore
+        return file.getbuffer().tobytes()
+
+    def decode_data(self, data: bytes | memoryview) -> PIL_Image.Image:
+        img = PIL_Image.open(io.BytesIO(data))  # type: ignore
+        img.load()
+        return img
+
+    @property
+    def encoding(self) -> Ext:
+        return Ext(os.path.splitext(self.file_name)[1].lstrip("."))
 
     @staticmethod
     async def from_ndarray(
         arr: np.ndarray[Any, Any],
         encoding: Ext = Ext.PNG,
     ) -> "Image":
-        file = io.BytesIO()
-        img = PIL_Image.fromarray(arr)  # type: ignore
-        img.save(file, format=encoding.value)  # type: ignore
-
-        return await Image(
-            obj_ext=encoding,
-        ).init_from_val(
-            val=file.getbuffer().tobytes(),
-        )
+        """Wrap a copy of an array, it is encoded only once the image gets stored."""
+        arr = arr.copy()
+        arr.flags.writeable = False
+        return await Image(obj_ext=encoding).init_from_decoded(arr)
 
     @staticmethod
     async def from_pil(
         img: PIL_Image.Image,
         encoding: Ext = Ext.PNG,
     ) -> "Image":
-        file = io.BytesIO()
-        img.save(file, format=encoding.value)  # type: ignore
-
-        return await Image(
-            obj_ext=encoding,
-        ).init_from_val(
-            val=file.getbuffer().tobytes(),
-        )
+        return await Image(obj_ext=encoding).init_from_decoded(img.copy())
 
     async def to_ndarray(self, keep_alpha_if_png: bool = False) -> NDArray[Any]:
-        data = await self.get_data()
-        img_bytes_io = io.BytesIO(data)
-        img = PIL_Image.open(img_bytes_io)  # type: ignore
-        img = np.asarray(img)
+        img = await self.decode()
+        img = img if isinstance(img, np.ndarray) else np.asarray(img)
         if keep_alpha_if_png:
             return img
         return img[..., :3]
 
     async def to_pil(self) -> PIL_Image.Image:
-        data = await self.get_data()
-        img_bytes_io = io.BytesIO(data)
-        img = PIL_Image.open(img_bytes_io)  # type: ignore
-        return img
+        img = await self.decode()
+        if isinstance(img, np.ndarray):
+            return PIL_Image.fromarray(img)  # type: ignore
+        return img.copy()
 
 
 class Audio(HykoBaseType):
-    @staticmethod
-    def validate_object(val: "Audio"):
-        file_name = val.file_name
-        obj_id, obj_ext = os.path.splitext(file_name)
-        obj_id = UUID(obj_id.split("_")[0])
-        obj_ext = Ext(obj_ext.lstrip("."))
-        assert obj_ext.value in [
-            Ext.MP3,
-            Ext.WEBM,
-            Ext.WAV,
-        ], "Invalid file extension for Audio error"
-        return Audio(obj_ext=obj_ext, file_name=file_name)
+    __slots__ = ()
 
-    @staticmethod
-    def validate_file_name(file_name: str):
-        obj_id, obj_ext = os.path.splitext(file_name)
-        obj_id = UUID(obj_id.split("_")[0])
-        obj_ext = Ext(obj_ext.lstrip("."))
-        assert obj_ext.value in [
+    supported_ext = frozenset(
+        ext.value
+        for ext in (
             Ext.MP3,
             Ext.WEBM,
             Ext.WAV,
-        ], "Invalid file extension for Audio error"
-        return Audio(obj_ext=obj_ext, file_name=file_name)
+        )
+    )
 
-    @staticmethod
-    async def from_ndarray(arr: np.ndarray[Any, Any], sampling_rate: int) -> "Audio":
+    def encode(self) -> bytes:
+        arr, sampling_rate = self.decoded
         file = io.BytesIO()
         soundfile.write(file, arr, samplerate=sampling_rate, format="MP3")  # type: ignore
+        return file.getbuffer().tobytes()
 
-        return await Audio(
-            obj_ext=Ext.MP3,
-        ).init_from_val(
-            val=file.getbuffer().tobytes(),
-        )
+    @staticmethod
+    async def from_ndarray(arr: np.ndarray[Any, Any], sampling_rate: int) -> "Audio":
+        """Wrap a copy of a waveform, it is encoded only once the audio gets stored."""
+        arr = arr.copy()
+        arr.flags.writeable = False
+        return await Audio(obj_ext=Ext.MP3).init_from_decoded((arr, sampling_rate))
 
     async def convert_to(self, new_ext: Ext):
         async with aiofiles.open(self.file_name, mode="wb") as file:
@@ -287,47 +588,46 @@ class Audio(HykoBaseType):
             obj_ext=new_ext,
         ).init_from_val(val=data)
 
+    async def decode(self) -> tuple[np.ndarray[Any, Any], int]:
+        if self.decoded is None:
+            with span("convert", type=type(self).__name__):
+                new_audio = await self.convert_to(Ext.MP3)
+            data = await new_audio.get_data()
+
+            with (
+                span("decode", type=type(self).__name__),
+                codec_duration.time(operation="decode", type=type(self).__name__),
+                soundfile.SoundFile(io.BytesIO(data), "r") as file_,
+            ):
+                waveform: np.ndarray = file_.read(dtype="float32", always_2d=True)  # type: ignore
+                sample_rate: int = file_.samplerate
+
+            # Shared with every reader of this value, like `from_ndarray` arrays.
+            waveform.flags.writeable = False
+            self.decoded = (waveform, sample_rate)
+        return self.decoded
+
     async def to_ndarray(  # type: ignore
         self,
         frame_offset: int = 0,
         num_frames: int = -1,
     ):
-        new_audio = await self.convert_to(Ext.MP3)
-        data = await new_audio.get_data()
-        audio_readable = io.BytesIO(data)
-
-        with soundfile.SoundFile(audio_readable, "r") as file_:
-            frames = file_._prepare_read(frame_offset, None, num_frames)  # type: ignore
-            waveform: np.ndarray = file_.read(frames, "float32", always_2d=True)  # type: ignore
-            sample_rate: int = file_.samplerate
+        arr, sample_rate = await self.decode()
+        waveform = np.asarray(arr, dtype=np.float32)
+        if waveform.ndim == 1:
+            waveform = waveform.reshape(-1, 1)
 
-        return waveform, sample_rate  # type: ignore
+        end = None if num_frames < 0 else frame_offset + num_frames
+        # A copy, callers may modify it without affecting later reads.
+        return waveform[frame_offset:end].copy(), sample_rate  # type: ignore
 
 
 class Video(HykoBaseType):
-    @staticmethod
-    def validate_object(val: "Video"):
-        file_name = val.file_name
-        obj_id, obj_ext = os.path.splitext(file_name)
-        obj_id = UUID(obj_id.split("_")[0])
-        obj_ext = Ext(obj_ext.lstrip("."))
-        assert obj_ext.value in [
-            Ext.MP4,
-            Ext.WEBM,
-            Ext.AVI,
-            Ext.MKV,
-            Ext.MOV,
-            Ext.WMV,
-            Ext.GIF,
-        ], "Invalid file extension for Video error"
-        return Video(obj_ext=obj_ext, file_name=file_name)
+    __slots__ = ()
 
-    @staticmethod
-    def validate_file_name(file_name: str):
-        obj_id, obj_ext = os.path.splitext(file_name)
-        obj_id = UUID(obj_id.split("_")[0])
-        obj_ext = Ext(obj_ext.lstrip("."))
-        assert obj_ext.value in [
+    supported_ext = frozenset(
+        ext.value
+        for ext in (
             Ext.MP4,
             Ext.WEBM,
             Ext.AVI,
@@ -335,43 +635,45 @@ class Video(HykoBaseType):
             Ext.MOV,
             Ext.WMV,
             Ext.GIF,
-        ], "Invalid file extension for Video error"
-        return Video(obj_ext=obj_ext, file_name=file_name)
+        )
+    )
 
 
 class PDF(HykoBaseType):
-    @staticmethod
-    def validate_object(val: "PDF"):
-        file_name = val.file_name
-        obj_id, obj_ext = os.path.splitext(file_name)
-        obj_id = UUID(obj_id.split("_")[0])
-        obj_ext = Ext(obj_ext.lstrip("."))
-        assert obj_ext.value in [Ext.PDF], "Invalid file extension for PDF error"
-        return PDF(obj_ext=obj_ext, file_name=file_name)
+    __slots__ = ()
 
-    @staticmethod
-    def validate_file_name(file_name: str):
-        obj_id, obj_ext = os.path.splitext(file_name)
-        obj_id = UUID(obj_id.split("_")[0])
-        obj_ext = Ext(obj_ext.lstrip("."))
-        assert obj_ext.value in [Ext.PDF], "Invalid file extension for PDF error"
-        return PDF(obj_ext=obj_ext, file_name=file_name)
+    supported_ext = frozenset({Ext.PDF.value})
 
 
 class CSV(HykoBaseType):
-    @staticmethod
-    def validate_object(val: "CSV"):
-        file_name = val.file_name
-        obj_id, obj_ext = os.path.splitext(file_name)
-        obj_id = UUID(obj_id.split("_")[0])
-        obj_ext = Ext(obj_ext.lstrip("."))
-        assert obj_ext.value in [Ext.CSV], "Invalid file extension for CSV error"
-        return PDF(obj_ext=obj_ext, file_name=file_name)
-
-    @staticmethod
-    def validate_file_name(file_name: str):
-        obj_id, obj_ext = os.path.splitext(file_name)
-        obj_id = UUID(obj_id.split("_")[0])
-        obj_ext = Ext(obj_ext.lstrip("."))
-        assert obj_ext.value in [Ext.CSV], "Invalid file extension for CSV error"
-        return PDF(obj_ext=obj_ext, file_name=file_name)
+    __slots__ = ()
+
+    supported_ext = frozenset({Ext.CSV.value})
+
+
+def _unsaved_media(value: Any, found: list[HykoBaseType]) -> list[HykoBaseType]:
+    if isinstance(value, HykoBaseType):
+        if value.pending or value.upload is not None:
+            found.append(value)
+    elif isinstance(value, BaseModel):
+        for name in type(value).model_fields:
+            _unsaved_media(getattr(value, name), found)
+    elif isinstance(value, dict):
+        for item in value.values():  # type: ignore
+            _unsaved_media(item, found)
+    elif isinstance(value, list | tuple | set):
+        for item in value:  # type: ignore
+            _unsaved_media(item, found)
+    return found
+
+
+async def persist(value: Any) -> None:
+    """Upload every deferred media object reachable from `value`.
+
+    Values are walked without awaiting, only media still to upload get a task.
+    """
+    media = _unsaved_media(value, [])
+    if len(media) == 1:
+        await media[0].persist()
+    elif media:
+        await asyncio.gather(*(item.persist() for item in media))
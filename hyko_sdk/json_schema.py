@@ -1,6 +1,6 @@
-from typing import Any, Optional
+from typing import Any, Optional, Self
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from pydantic.json_schema import GenerateJsonSchema, JsonSchemaMode
 from pydantic_core import CoreSchema
 
@@ -187,3 +187,151 @@ class JsonSchemaGeneratorWithComponents(JsonSchemaGenerator):
                 property.component = set_default_component(property.type)
 
         return json_schema.model_dump(exclude_none=True)
+
+
+_components = TypeAdapter(Components)
+
+
+class PortSchemaGenerator(GenerateJsonSchema):
+    def encode_default(self, dft: Any) -> Any:
+        # Ports default to None, skip building a serializer for plain values.
+        if dft is None or type(dft) in (str, int, bool):
+            return dft
+        return super().encode_default(dft)
+
+
+class PortSchema:
+    """Single pass from a model JSON schema to the metadata of its ports.
+
+    Produces the same ports as validating the schema into `CustomJsonSchema`
+    through `JsonSchemaGeneratorWithComponents`, or `JsonSchemaGenerator` when
+    `components` is false, but reads the schema pydantic generates once and
+    builds the components and items directly, without dumping and validating
+    the whole schema again at every step.
+    """
+
+    def __init__(self, schema: dict[str, Any], components: bool = True):
+        self.properties: dict[str, dict[str, Any]] = schema.get("properties", {})
+        self.defs: dict[str, dict[str, Any]] = schema.get("$defs", {})
+        self.components = components
+
+    @classmethod
+    def from_model(cls, model: type[BaseModel], components: bool = True) -> Self:
+        return cls(
+            model.model_json_schema(
+                schema_generator=PortSchemaGenerator, ref_template="{model}"
+            ),
+            components=components,
+        )
+
+    def fields(self) -> dict[str, dict[str, Any]]:
+        """Keyword arguments of the `FieldMetadata` of every property."""
+        return {
+            name: self.field(property) for name, property in self.properties.items()
+        }
+
+    def field(self, property: dict[str, Any]) -> dict[str, Any]:  # noqa: C901
+        type = self.port_type(property)
+        items = self.items(property.get("items"))
+        component = self.component(property)
+        all_of = property.get("allOf")
+        ref = property.get("$ref")
+
+        _def = None
+        if all_of and self.defs:
+            _def = self.defs[all_of[0]["$ref"]]
+            type = PortType(_def["type"]) if "enum" in _def else PortType.OBJECT
+        elif ref and self.defs:
+            type = PortType.OBJECT
+
+        if self.components and not component:
+            if _def is not None:
+                if "enum" in _def:
+                    component = Select(
+                        choices=[
+                            SelectChoice(label=choice, value=choice)
+                            for choice in _def["enum"]
+                        ]
+                    )
+                else:
+                    component = ComplexComponent(fields=self.sub_fields(_def))
+            elif ref and self.defs:
+                _def = self.defs[ref]
+                if "properties" in _def:
+                    component = ComplexComponent(fields=self.sub_fields(_def))
+
+            if type == PortType.ARRAY:
+                component = self.list_component(items, component)
+
+            if not component:
+                component = set_default_component(type)
+
+        return {
+            "type": type,
+            "description": property.get("description"),
+            "default": property.get("default"),
+            "items": items,
+            "component": component,
+            "hidden": property.get("hidden"),
+        }
+
+    def list_component(
+        self, items: Optional[Item | Ref], component: Optional[Components]
+    ) -> Optional[Components]:
+        if isinstance(items, Item):
+            if isinstance(items.items, Ref) and self.defs:
+                item_component = ListComponent(
+                    item_component=self.model_component(items.items.ref)
+                )
+            elif isinstance(items.items, Item):
+                item_component = ListComponent(
+                    item_component=set_default_component(items.items.type)
+                )
+            else:
+                item_component = set_default_component(items.type)
+
+            if items.type == PortType.ANY or (
+                isinstance(items.items, Item) and items.items.type == PortType.ANY
+            ):
+                return None
+            return ListComponent(item_component=item_component)
+
+        if isinstance(items, Ref) and self.defs:
+            return ListComponent(item_component=self.model_component(items.ref))
+
+        return component
+
+    def model_component(self, ref: str) -> ComplexComponent:
+        _def = self.defs[ref]
+        assert "properties" in _def
+        return ComplexComponent(fields=self.sub_fields(_def))
+
+    def sub_fields(self, _def: dict[str, Any]) -> list[SubField]:
+        fields: list[SubField] = []
+        for name, property in _def["properties"].items():
+            type = self.port_type(property)
+            fields.append(
+                SubField(
+                    name=name,
+                    type=type,
+                    description=property.get("description"),
+                    component=self.component(property) or set_default_component(type),
+                )
+            )
+        return fields
+
+    def items(self, schema: Optional[dict[str, Any]]) -> Optional[Item | Ref]:
+        if schema is None:
+            return None
+        if "$ref" in schema:
+            return Ref(ref=schema["$ref"])
+        return Item(type=self.port_type(schema), items=self.items(schema.get("items")))
+
+    @staticmethod
+    def port_type(schema: dict[str, Any]) -> PortType:
+        return PortType(schema.get("type", PortType.ANY))
+
+    @staticmethod
+    def component(schema: dict[str, Any]) -> Optional[Components]:
+        component = schema.get("component")
+        return _components.validate_python(component) if component else None
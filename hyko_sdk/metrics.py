@@ -0,0 +1,244 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+LabelValues = tuple[str, ...]
+Samples = dict[LabelValues, float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[tuple[str, LabelValues, float]]: ...
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for name, values, value in self.samples():
+            labelnames = self.labelnames + (("le",) if name.endswith("_bucket") else ())
+            lines.append(
+                f"{name}{_format_labels(labelnames, values)} {_format_value(value)}"
+            )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Samples = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self.key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self.key(labels), 0)
+
+    def samples(self) -> Iterator[tuple[str, LabelValues, float]]:
+        for values, value in list(self._values.items()):
+            yield self.name, values, value
+
+
+class Gauge(Counter):
+    """Gauge set by the SDK, or read from `collect` when the metrics are scraped."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        collect: Optional[Callable[[], Samples]] = None,
+    ):
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[self.key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterator[tuple[str, LabelValues, float]]:
+        if self.collect is not None:
+            for values, value in self.collect().items():
+                yield self.name, values, value
+        yield from super().samples()
+
+
+class CollectedCounter(Gauge):
+    """Counter kept by another object and read when the metrics are scraped."""
+
+    type = "counter"
+
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = (*buckets, float("inf"))
+        # Per label values: count of every bucket, sum and count
+        self._values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self.key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * len(self.buckets), [0.0, 0])
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            total[0] += value
+            total[1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self.key(labels))
+        return int(entry[1][1]) if entry else 0
+
+    def samples(self) -> Iterator[tuple[str, LabelValues, float]]:
+        for values, (counts, total) in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    (*values, _format_value(bound)),
+                    cumulative,
+                )
+            yield f"{self.name}_sum", values, total[0]
+            yield f"{self.name}_count", values, total[1]
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self.metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+node_calls = REGISTRY.register(
+    Counter("hyko_node_calls_total", "Calls run by a node.", ("node", "status"))
+)
+node_call_duration = REGISTRY.register(
+    Histogram(
+        "hyko_node_call_duration_seconds",
+        "Duration of node calls, streams included.",
+        ("node",),
+    )
+)
+node_in_flight = REGISTRY.register(
+    Gauge("hyko_node_in_flight", "Calls currently running per node.", ("node",))
+)
+node_startup_duration = REGISTRY.register(
+    Gauge(
+        "hyko_node_startup_duration_seconds",
+        "Duration of the last startup of a node.",
+        ("node",),
+    )
+)
+node_queue_wait_duration = REGISTRY.register(
+    Histogram(
+        "hyko_node_queue_wait_seconds",
+        "Time calls spent queued for an admission slot.",
+        ("node",),
+    )
+)
+storage_read_bytes = REGISTRY.register(
+    Counter("hyko_storage_read_bytes_total", "Bytes downloaded from storage.")
+)
+storage_written_bytes = REGISTRY.register(
+    Counter("hyko_storage_written_bytes_total", "Bytes uploaded to storage.")
+)
+storage_deduplicated_bytes = REGISTRY.register(
+    Counter(
+        "hyko_storage_deduplicated_bytes_total",
+        "Bytes not uploaded because identical content was already stored.",
+    )
+)
+codec_duration = REGISTRY.register(
+    Histogram(
+        "hyko_media_codec_duration_seconds",
+        "Time spent encoding and decoding media.",
+        ("operation", "type"),
+    )
+)
@@ -23,6 +23,21 @@ class Tag(str, Enum):
     ai = "ai"
 
 
+class ExecutionMode(str, Enum):
+    """Where the `on_call` handler of a node runs."""
+
+    ASYNC = "async"
+    PROCESS = "process"
+
+
+class UploadMode(str, Enum):
+    """When media created from bytes with `init_from_val` are uploaded."""
+
+    EAGER = "eager"
+    LAZY = "lazy"
+    BACKGROUND = "background"
+
+
 class SupportedProviders(str, Enum):
     """Supported third-party providers."""
 
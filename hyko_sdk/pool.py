@@ -0,0 +1,158 @@
+import asyncio
+import importlib
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.context import BaseContext
+from typing import Any, Callable, Coroutine, Optional, TypeVar
+
+from fastapi import HTTPException
+
+R = TypeVar("R")
+
+# Event loop owned by a pool worker, kept alive between tasks so that models
+# loaded by `startup` and clients bound to the loop survive across calls.
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _init_worker(modules: list[str]):
+    global _worker_loop
+    for module in modules:
+        importlib.import_module(module)
+
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+
+
+class WorkerError(Exception):
+    """Picklable form of an error raised by a task in a pool worker.
+
+    `HTTPException` cannot be unpickled, and an exception failing to unpickle
+    breaks the whole pool, so workers send this instead and the parent raises
+    it again as an `HTTPException`.
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        detail: Any = None,
+        headers: Optional[dict[str, str]] = None,
+    ):
+        super().__init__(status_code, detail, headers)
+        self.status_code = status_code
+        self.detail = detail
+        self.headers = headers
+
+
+def _run_task(fn: Callable[..., R], *args: Any) -> R:
+    try:
+        return fn(*args)
+    except HTTPException as e:
+        raise WorkerError(e.status_code, e.detail, e.headers) from None
+    except Exception as e:
+        try:
+            pickle.loads(pickle.dumps(e))
+        except Exception:
+            raise WorkerError(500, f"{type(e).__name__}: {e}") from None
+        raise
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def run_in_worker(coro: Coroutine[Any, Any, R]) -> R:
+    """Run a coroutine to completion on the event loop of the current worker."""
+    global _worker_loop
+    if _worker_loop is None:
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop.run_until_complete(coro)
+
+
+def ensure_module(module: str):
+    """Import a module in the current worker if it is not loaded yet."""
+    importlib.import_module(module)
+
+
+class ProcessPool:
+    """Pool of worker processes shared by every node in process execution mode.
+
+    Each worker imports the modules that define process-mode nodes once, so
+    the `Registry` is populated per worker and models started by a node stay
+    loaded in that worker between calls. Nodes defined in `__main__` are only
+    available in workers that fork, other start methods cannot import a script.
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _modules: set[str] = set()
+    _uses_main: bool = False
+    _lock = threading.Lock()
+    max_workers: int = 0
+
+    @classmethod
+    def add_module(cls, module: str):
+        if module == "__main__":
+            cls._uses_main = True
+        else:
+            cls._modules.add(module)
+
+    @classmethod
+    def start(
+        cls,
+        max_workers: Optional[int] = None,
+        mp_context: Optional[BaseContext] = None,
+        prefork: bool = True,
+    ) -> ProcessPoolExecutor:
+        # Warmups start the pool from threads, the event loop may start it too.
+        with cls._lock:
+            if cls._executor is not None:
+                return cls._executor
+            mp_context = mp_context or multiprocessing.get_context()
+            if cls._uses_main and mp_context.get_start_method() != "fork":
+                raise RuntimeError(
+                    "nodes in process execution mode defined in __main__ need "
+                    "the fork start method, define them in an importable module"
+                )
+            max_workers = max_workers or os.cpu_count() or 1
+            cls.max_workers = max_workers
+            executor = cls._executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=mp_context,
+                initializer=_init_worker,
+                initargs=(sorted(cls._modules),),
+            )
+
+        if prefork:
+            # Spawn every worker now so that no request pays for process
+            # creation and module imports.
+            futures.wait([executor.submit(_ping) for _ in range(max_workers)])
+        return executor
+
+    @classmethod
+    async def run(cls, fn: Callable[..., R], *args: Any) -> R:
+        executor = cls.start(prefork=False)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, _run_task, fn, *args
+            )
+        except WorkerError as e:
+            raise HTTPException(
+                status_code=e.status_code, detail=e.detail, headers=e.headers
+            ) from e
+        except BrokenProcessPool:
+            # A worker died, the executor refuses every later task, so the
+            # next call starts a new pool.
+            if cls._executor is executor:
+                cls.shutdown(wait=False)
+            raise
+
+    @classmethod
+    def shutdown(cls, wait: bool = True):
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=wait, cancel_futures=True)
+            cls._executor = None
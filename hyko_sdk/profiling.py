@@ -0,0 +1,115 @@
+import asyncio
+import cProfile
+import json
+import os
+import random
+import re
+import time
+import tracemalloc
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from uuid import uuid4
+
+
+class Profiler:
+    """Opt-in profiling of node calls, written to `directory`.
+
+    A `sample_rate` fraction of calls is always profiled. With a
+    `latency_threshold` in seconds every other call is profiled too, but only
+    kept when it runs longer than the threshold. Each profiled call writes
+    `<node>-<call id>.prof` (cProfile, open with `pstats`), `.tracemalloc` (a
+    `tracemalloc.Snapshot`, when `trace_memory` is set) and `.json` (call
+    summary). Enable it with `configure` or the `HYKO_PROFILE_DIR` environment
+    variable, both sample every call unless `sample_rate` is set lower.
+
+    Only one call is profiled at a time per process, calls starting meanwhile
+    run unprofiled. Profiles cover everything running on the event loop thread
+    during the call, including other concurrent calls.
+    """
+
+    directory: Optional[str] = os.environ.get("HYKO_PROFILE_DIR")
+    sample_rate: float = 1.0
+    latency_threshold: Optional[float] = None
+    trace_memory: bool = True
+
+    _active = False
+
+    @classmethod
+    def configure(
+        cls,
+        directory: Optional[str],
+        sample_rate: float = 1.0,
+        latency_threshold: Optional[float] = None,
+        trace_memory: bool = True,
+    ):
+        cls.directory = directory
+        cls.sample_rate = sample_rate
+        cls.latency_threshold = latency_threshold
+        cls.trace_memory = trace_memory
+
+    @classmethod
+    @asynccontextmanager
+    async def profile(cls, node: str) -> AsyncIterator[None]:
+        if cls._active or not cls.directory:
+            yield
+            return
+        sampled = random.random() < cls.sample_rate
+        if not sampled and cls.latency_threshold is None:
+            yield
+            return
+
+        cls._active = True
+        trace_memory = cls.trace_memory and not tracemalloc.is_tracing()
+        if trace_memory:
+            tracemalloc.start()
+        profile = cProfile.Profile()
+        started_at = time.time()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            duration = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot() if trace_memory else None
+            if trace_memory:
+                tracemalloc.stop()
+            cls._active = False
+
+            slow = (
+                cls.latency_threshold is not None and duration > cls.latency_threshold
+            )
+            if sampled or slow:
+                await asyncio.to_thread(
+                    cls.write,
+                    node,
+                    profile,
+                    snapshot,
+                    {
+                        "node": node,
+                        "started_at": started_at,
+                        "duration": duration,
+                        "sampled": sampled,
+                        "slow": slow,
+                    },
+                )
+
+    @classmethod
+    def write(
+        cls,
+        node: str,
+        profile: cProfile.Profile,
+        snapshot: Optional[tracemalloc.Snapshot],
+        summary: dict[str, object],
+    ):
+        assert cls.directory
+        os.makedirs(cls.directory, exist_ok=True)
+        call_id = uuid4().hex
+        file_name = re.sub(r"[^\w.-]", "_", node) + "-" + call_id
+        prefix = os.path.join(cls.directory, file_name)
+
+        profile.dump_stats(prefix + ".prof")
+        if snapshot is not None:
+            snapshot.dump(prefix + ".tracemalloc")
+        with open(prefix + ".json", "w") as file:
+            json.dump({**summary, "call_id": call_id}, file)
@@ -0,0 +1,302 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager, nullcontext
+from enum import Enum
+from typing import Any, AsyncIterator, Mapping, Optional
+
+import orjson
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+from .definitions import Registry, ToolkitNode
+from .metrics import REGISTRY
+from .models import MetaDataBase, StorageConfig
+from .pool import ProcessPool
+from .tracing import collect_timings
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackRequest(BaseModel):
+    metadata: MetaDataBase
+    oauth_token: Optional[str] = None
+
+
+class StreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    SSE = "sse"
+
+
+stream_media_types = {
+    StreamFormat.NDJSON: "application/x-ndjson",
+    StreamFormat.SSE: "text/event-stream",
+}
+
+
+class JSONBytesResponse(Response):
+    """Response for a body that is already JSON, headers are built directly."""
+
+    media_type = "application/json"
+
+    def init_headers(self, headers: Optional[Mapping[str, str]] = None):
+        self.raw_headers = [
+            (b"content-length", b"%d" % len(self.body)),
+            (b"content-type", b"application/json"),
+        ]
+        if headers:
+            self.raw_headers.extend(
+                (key.lower().encode("latin-1"), value.encode("latin-1"))
+                for key, value in headers.items()
+            )
+
+
+def dump_json(payload: Any) -> bytes:
+    """JSON of node outputs, serialized in one pass by pydantic-core."""
+    if isinstance(payload, BaseModel):
+        return payload.__pydantic_serializer__.to_json(payload, by_alias=True)
+    return orjson.dumps(payload)
+
+
+def encode_event(
+    payload: Any, format: StreamFormat, event: Optional[str] = None
+) -> bytes:
+    data = dump_json(payload)
+    if format == StreamFormat.NDJSON:
+        return data + b"\n"
+    if event:
+        return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+    return b"data: " + data + b"\n\n"
+
+
+class ExecutorState:
+    """Readiness and in-flight bookkeeping used to drain the executor."""
+
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+        self.in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @asynccontextmanager
+    async def track(self):
+        if self.draining:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="executor is shutting down",
+            )
+        self.in_flight += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            if not self.in_flight:
+                self._idle.set()
+
+    async def drain(self, timeout: Optional[float]):
+        self.ready = False
+        self.draining = True
+        try:
+            async with asyncio.timeout(timeout):
+                await self._idle.wait()
+        except TimeoutError:
+            pass
+
+
+def get_node(name: str) -> ToolkitNode:
+    try:
+        return Registry.get_handler(name)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+
+
+# Call bodies are validated from raw JSON by the node's request model, the
+# OpenAPI schema of the body is only documented here.
+call_request_body = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "inputs": {"type": "object"},
+                        "params": {"type": "object"},
+                        "storage_config": StorageConfig.model_json_schema(),
+                    },
+                    "required": ["storage_config"],
+                }
+            }
+        },
+    }
+}
+
+
+def create_app(  # noqa: C901
+    startup_params: Optional[dict[str, dict[str, Any]]] = None,
+    drain_timeout: Optional[float] = 30,
+    warmup_concurrency: Optional[int] = 4,
+    server_timing: bool = False,
+) -> FastAPI:
+    """Build the executor app serving every node in the `Registry`.
+
+    `startup_params` maps node names to the params used to start and warm up
+    their models before the executor reports ready, up to `warmup_concurrency`
+    at once, other nodes start on their first call. On shutdown the executor
+    stops accepting calls and waits up to `drain_timeout` seconds for running
+    calls to finish. With `server_timing` call responses carry a
+    `Server-Timing` header with the time spent in each phase of the call.
+    """
+    state = ExecutorState()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        if startup_params:
+            await Registry.warmup(
+                list(startup_params), startup_params, warmup_concurrency
+            )
+
+        state.ready = True
+        yield
+
+        await state.drain(drain_timeout)
+        ProcessPool.shutdown(wait=False)
+
+    app = FastAPI(
+        title="Hyko executor",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
+    )
+    app.state.executor = state
+
+    @app.get("/health/live")
+    async def live():
+        return {"status": "alive"}
+
+    @app.get("/health/ready")
+    async def ready():
+        if not state.ready or state.draining:
+            return ORJSONResponse(
+                {"status": "unavailable"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        return {"status": "ready"}
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(
+            REGISTRY.render(), media_type="text/plain; version=0.0.4"
+        )
+
+    @app.get("/metadata")
+    async def metadata():
+        return JSONBytesResponse(Registry.dump_all_metadata())
+
+    @app.post("/call/{name}", openapi_extra=call_request_body)
+    async def call(name: str, request: Request):
+        node = get_node(name)
+        body = await request.body()
+        async with state.track():
+            with collect_timings() if server_timing else nullcontext() as timings:
+                outputs = await node.call_json(body)
+
+        return JSONBytesResponse(
+            dump_json(outputs),
+            headers={"Server-Timing": timings.header()} if timings else None,
+        )
+
+    @app.post("/call/{name}/stream", openapi_extra=call_request_body)
+    async def call_stream(
+        name: str,
+        request: Request,
+        format: StreamFormat = StreamFormat.NDJSON,
+    ):
+        node = get_node(name)
+        body = await request.body()
+
+        # Admission and the first step run before the status line is sent, so
+        # that rejections and early failures keep their HTTP status. Like
+        # `call`, the profile covers the whole call, up to the end of the stream.
+        resources = AsyncExitStack()
+        await resources.enter_async_context(node.profiling())
+        head: list[Any] = []
+        try:
+            validated_inputs, validated_params, storage_config = node.validate_json(
+                body
+            )
+            await resources.enter_async_context(state.track())
+            stream = node.run_stream(validated_inputs, validated_params, storage_config)
+            resources.push_async_callback(stream.aclose)
+            head.append(await anext(stream))
+        except StopAsyncIteration:
+            pass
+        except BaseException:
+            await resources.aclose()
+            raise
+
+        async def events():
+            try:
+                for outputs in head:
+                    yield encode_event(outputs, format)
+                async for outputs in stream:
+                    yield encode_event(outputs, format)
+            except HTTPException as e:
+                # The status line is already sent, report the error in-band.
+                yield encode_event(
+                    {"error": e.detail, "status_code": e.status_code},
+                    format,
+                    event="error",
+                )
+            except Exception:
+                logger.exception("stream of node %s failed", node.name)
+                yield encode_event(
+                    {
+                        "error": "Internal Server Error",
+                        "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    },
+                    format,
+                    event="error",
+                )
+            finally:
+                await resources.aclose()
+
+        return StreamingResponse(
+            events(),
+            media_type=stream_media_types[format],
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            # Releases the call if the client left before the stream started.
+            background=BackgroundTask(resources.aclose),
+        )
+
+    @app.post("/callback/{id}")
+    async def callback(id: str, request: CallbackRequest):
+        try:
+            handler = Registry.get_callback(id)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail=str(e)
+            ) from e
+
+        async with state.track():
+            metadata = await handler(request.metadata, request.oauth_token)
+
+        return JSONBytesResponse(
+            metadata.__pydantic_serializer__.to_json(metadata, exclude_none=True)
+        )
+
+    return app
+
+
+def serve(
+    app: Optional[FastAPI] = None,
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    **kwargs: Any,
+):
+    """Run the executor with uvicorn, extra kwargs are passed to `uvicorn.run`."""
+    kwargs.setdefault("timeout_graceful_shutdown", 30)
+    uvicorn.run(app or create_app(), host=host, port=port, **kwargs)
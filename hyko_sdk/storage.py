@@ -0,0 +1,605 @@
+import asyncio
+import gzip
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from http import HTTPStatus
+from typing import Any, AsyncContextManager, AsyncIterator, BinaryIO, Optional
+from uuid import uuid4
+
+import httpx
+from fastapi import HTTPException, status
+
+from .components.components import Ext
+from .metrics import REGISTRY, CollectedCounter, Gauge
+from .models import StorageConfig
+from .utils import extension_to_mimetype
+
+ConfigKey = tuple[str, str, str]
+
+# Storage configuration of the running call or flow. Concurrent calls run with
+# their own credentials, `StorageConfig.configure` only sets the fallback.
+_storage_config: ContextVar[Optional[ConfigKey]] = ContextVar(
+    "storage_config", default=None
+)
+
+
+def config_key() -> ConfigKey:
+    """Host and tokens of the current call, or of `StorageConfig` outside calls."""
+    config = _storage_config.get()
+    if config is not None:
+        return config
+    return (StorageConfig.host, StorageConfig.access_token, StorageConfig.refresh_token)
+
+
+def _key(storage_config: StorageConfig) -> ConfigKey:
+    return (
+        storage_config.host,
+        storage_config.access_token,
+        storage_config.refresh_token,
+    )
+
+
+def bind_storage_config(storage_config: StorageConfig):
+    """Use `storage_config` for the rest of the current context."""
+    _storage_config.set(_key(storage_config))
+
+
+@contextmanager
+def storage_scope(storage_config: StorageConfig):
+    """Use `storage_config` for media created and stored in this scope.
+
+    Tasks started inside keep it, like background uploads of the call.
+    """
+    token = _storage_config.set(_key(storage_config))
+    try:
+        yield
+    finally:
+        _storage_config.reset(token)
+
+
+def client_options(config: Optional[ConfigKey] = None) -> dict[str, Any]:
+    host, access_token, refresh_token = config or config_key()
+    return {
+        "base_url": host,
+        "verify": False,
+        "cookies": {
+            "access_token": f"Bearer {access_token}",
+            "refresh_token": f"Bearer {refresh_token}",
+        },
+        "timeout": 10,
+    }
+
+
+class StorageClients:
+    """httpx clients of one event loop, one per storage configuration.
+
+    Concurrent calls may run with different tokens, so each configuration gets
+    its own client. Past `max_clients` the least recently used one is dropped,
+    and closed only once no request is using it anymore.
+    """
+
+    max_clients: int = 16
+
+    def __init__(self):
+        self._clients: OrderedDict[ConfigKey, httpx.AsyncClient] = OrderedDict()
+        self._users: dict[httpx.AsyncClient, int] = {}
+        self._closing: set[asyncio.Task[None]] = set()
+
+    def get(self, config: ConfigKey) -> httpx.AsyncClient:
+        client = self._clients.get(config)
+        if client is not None:
+            self._clients.move_to_end(config)
+            return client
+
+        client = self._clients[config] = httpx.AsyncClient(**client_options(config))
+        while len(self._clients) > self.max_clients:
+            _, evicted = self._clients.popitem(last=False)
+            if evicted not in self._users:
+                task = asyncio.get_running_loop().create_task(evicted.aclose())
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+        return client
+
+    @asynccontextmanager
+    async def use(self, config: ConfigKey) -> AsyncIterator[httpx.AsyncClient]:
+        client = self.get(config)
+        self._users[client] = self._users.get(client, 0) + 1
+        try:
+            yield client
+        finally:
+            users = self._users.pop(client) - 1
+            if users:
+                self._users[client] = users
+            elif self._clients.get(config) is not client:
+                await client.aclose()
+
+
+# httpx clients are bound to the event loop they first ran on.
+_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, StorageClients] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _loop_clients() -> StorageClients:
+    loop = asyncio.get_running_loop()
+    clients = _clients.get(loop)
+    if clients is None:
+        clients = _clients[loop] = StorageClients()
+    return clients
+
+
+def storage_client(
+    config: Optional[ConfigKey] = None,
+) -> AsyncContextManager[httpx.AsyncClient]:
+    """Storage client for `config`, kept open until the block exits."""
+    return _loop_clients().use(config or config_key())
+
+
+def get_client(config: Optional[ConfigKey] = None) -> httpx.AsyncClient:
+    """Storage client shared by every media object on the running loop.
+
+    It may be closed once dropped by newer configurations, requests should go
+    through `storage_client`.
+    """
+    return _loop_clients().get(config or config_key())
+
+
+class StorageBackend(ABC):
+    """Where the data of media files is read from and written to."""
+
+    @abstractmethod
+    async def read(self, file_name: str) -> bytes: ...
+
+    async def read_view(self, file_name: str) -> Optional[memoryview]:
+        """Read-only view of a file without copying it, if the backend can."""
+        return None
+
+    @abstractmethod
+    async def write(
+        self, file_name: str, data: bytes, digest: Optional[str] = None
+    ) -> str:
+        """Store `data`, returns the file name it was stored under.
+
+        `digest` is the `content_digest` of `data` when the caller has it.
+        """
+
+    @abstractmethod
+    def write_sync(
+        self, file_name: str, data: bytes, digest: Optional[str] = None
+    ) -> str: ...
+
+    async def lookup(self, digest: str, ext: str) -> Optional[str]:
+        """Name of a stored file with this content digest and extension."""
+        return None
+
+    def exists(self, file_name: str) -> bool:
+        """Whether a file this process stored is still there, if cheap to tell."""
+        return True
+
+
+# Formats stored without compression of their own, worth compressing in transit.
+compressible_ext = frozenset(
+    ext.value
+    for ext in (
+        Ext.TXT,
+        Ext.CSV,
+        Ext.WAV,
+        Ext.BMP,
+        Ext.DIB,
+        Ext.TIFF,
+        Ext.TIF,
+        Ext.PGM,
+        Ext.PPM,
+        Ext.PNM,
+        Ext.RAS,
+        Ext.HDR,
+    )
+)
+
+
+class HTTPStorage(StorageBackend):
+    """The hyko storage API, with the host and tokens of `config`.
+
+    With `lookup_enabled`, uploads first ask `GET /storage/lookup/<digest><ext>`
+    whether the content is already stored, which costs a round trip on every
+    new upload, so it is only worth it against storage that supports it.
+
+    With `compress_uploads`, uploads of `compressible_ext` files are sent gzip
+    encoded, which needs storage that decodes request bodies, like the
+    stand-in server. Storage answering them with 400, 415 or 422 gets plain
+    uploads from then on. Downloads are negotiated through `Accept-Encoding`
+    and decompressed while streaming by httpx.
+    """
+
+    lookup_enabled: bool = os.environ.get("HYKO_STORAGE_LOOKUP", "") == "1"
+    compress_uploads: bool = os.environ.get("HYKO_STORAGE_COMPRESS", "") == "1"
+    # Level 1 compresses about 100 MB/s, faster than most links upload.
+    compression_level: int = 1
+    # Smaller bodies are sent as is.
+    compress_above: int = 1024
+
+    _plain_upload_hosts: set[str] = set()
+
+    def __init__(self, config: Optional[ConfigKey] = None):
+        self.config = config or config_key()
+        self.host = self.config[0]
+
+    @classmethod
+    def configure(
+        cls,
+        lookup_enabled: Optional[bool] = None,
+        compress_uploads: Optional[bool] = None,
+        compression_level: Optional[int] = None,
+    ):
+        """Options left to None keep their current value.
+
+        `compression_level` is the gzip level of compressed uploads.
+        """
+        if lookup_enabled is not None:
+            cls.lookup_enabled = lookup_enabled
+        if compress_uploads is not None:
+            cls.compress_uploads = compress_uploads
+        if compression_level is not None:
+            cls.compression_level = compression_level
+
+    @staticmethod
+    def upload_file(file_name: str, data: bytes):
+        _, ext = os.path.splitext(file_name)
+        # httpx only uploads bytes, not views of mapped files.
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        return {"file": (file_name, data, extension_to_mimetype[ext.lstrip(".")])}
+
+    def compress(self, file_name: str, size: int) -> bool:
+        return (
+            self.compress_uploads
+            and self.compression_level > 0
+            and size > self.compress_above
+            and os.path.splitext(file_name)[1].lstrip(".") in compressible_ext
+            and self.host not in self._plain_upload_hosts
+        )
+
+    def upload_body(
+        self, file_name: str, data: bytes, compress: bool
+    ) -> tuple[bytes, dict[str, str]]:
+        """Multipart body of an upload and its headers, gzip encoded if asked."""
+        request = httpx.Request(
+            "POST", "http://storage/", files=self.upload_file(file_name, data)
+        )
+        body = request.read()
+        headers = {"Content-Type": request.headers["Content-Type"]}
+        if compress:
+            encoded = gzip.compress(body, self.compression_level, mtime=0)
+            # Not worth making the storage decompress it.
+            if len(encoded) < len(body) * 0.9:
+                return encoded, {**headers, "Content-Encoding": "gzip"}
+        return body, headers
+
+    def rejected_encoding(self, res: httpx.Response, headers: dict[str, str]) -> bool:
+        # Storage unaware of request encodings fails to parse the gzip body.
+        if "Content-Encoding" in headers and res.status_code in (
+            HTTPStatus.BAD_REQUEST,
+            HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+            HTTPStatus.UNPROCESSABLE_ENTITY,
+        ):
+            self._plain_upload_hosts.add(self.host)
+            return True
+        return False
+
+    @staticmethod
+    def stored_name(res: httpx.Response) -> str:
+        if not res.is_success:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"failed to write to storage. {res.text}",
+            )
+        return res.json()
+
+    async def read(self, file_name: str) -> bytes:
+        async with storage_client(self.config) as client:
+            res = await client.get(url=f"/storage/{file_name}")
+        if not res.is_success:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"failed to read from storage. {res.text}",
+            )
+        return res.content
+
+    async def write(
+        self, file_name: str, data: bytes, digest: Optional[str] = None
+    ) -> str:
+        compress = self.compress(file_name, len(data))
+        if compress:
+            # zlib releases the GIL, compress off the event loop.
+            content, headers = await asyncio.to_thread(
+                self.upload_body, file_name, data, compress
+            )
+        else:
+            content, headers = self.upload_body(file_name, data, compress)
+
+        async with storage_client(self.config) as client:
+            res = await client.post(url="/storage/", content=content, headers=headers)
+            if self.rejected_encoding(res, headers):
+                content, headers = self.upload_body(file_name, data, compress=False)
+                res = await client.post(
+                    url="/storage/", content=content, headers=headers
+                )
+        return self.stored_name(res)
+
+    def write_sync(
+        self, file_name: str, data: bytes, digest: Optional[str] = None
+    ) -> str:
+        compress = self.compress(file_name, len(data))
+        content, headers = self.upload_body(file_name, data, compress)
+        with httpx.Client(**client_options(self.config)) as client:
+            res = client.post(url="/storage/", content=content, headers=headers)
+            if self.rejected_encoding(res, headers):
+                content, headers = self.upload_body(file_name, data, compress=False)
+                res = client.post(url="/storage/", content=content, headers=headers)
+        return self.stored_name(res)
+
+    async def lookup(self, digest: str, ext: str) -> Optional[str]:
+        if not self.lookup_enabled:
+            return None
+        async with storage_client(self.config) as client:
+            res = await client.get(url=f"/storage/lookup/{digest}{ext}")
+        return res.json() if res.is_success else None
+
+
+class LocalStorage(StorageBackend):
+    """Files kept in a local directory, for co-located workers and offline use.
+
+    `read_view` maps the file into memory instead of copying it, writes go to a
+    temporary file renamed over the destination so readers never see partial
+    files. File names are kept as given, they already embed a fresh UUID.
+    Writes given a digest link `.content/<digest><ext>` to the file so that
+    every worker sharing the directory finds identical content.
+    """
+
+    # Larger files are read off the event loop, smaller ones take less time to
+    # read than to hand over to a thread.
+    read_in_thread_above: int = 1024 * 1024
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, file_name: str) -> str:
+        if os.path.basename(file_name) != file_name or file_name.startswith("."):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"invalid storage file name {file_name!r}",
+            )
+        return os.path.join(self.root, file_name)
+
+    def open_file(self, file_name: str) -> BinaryIO:
+        try:
+            return open(self.path(file_name), "rb")
+        except FileNotFoundError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"failed to read from storage. {file_name} not found",
+            ) from e
+
+    async def read(self, file_name: str) -> bytes:
+        with self.open_file(file_name) as file:
+            if os.fstat(file.fileno()).st_size <= self.read_in_thread_above:
+                return file.read()
+            return await asyncio.to_thread(file.read)
+
+    async def read_view(self, file_name: str) -> Optional[memoryview]:
+        with self.open_file(file_name) as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return memoryview(b"")
+            # The mapping outlives the file descriptor and stays valid even if
+            # the file is replaced, it is unmapped once garbage collected.
+            return memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def content_path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.root, ".content", digest + ext)
+
+    async def write(
+        self, file_name: str, data: bytes, digest: Optional[str] = None
+    ) -> str:
+        return await asyncio.to_thread(self.write_sync, file_name, data, digest)
+
+    def write_sync(
+        self, file_name: str, data: bytes, digest: Optional[str] = None
+    ) -> str:
+        path = self.path(file_name)
+        os.makedirs(self.root, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=self.root, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        if digest is not None:
+            self.link_content(file_name, digest)
+        return file_name
+
+    def link_content(self, file_name: str, digest: str):
+        link = self.content_path(digest, os.path.splitext(file_name)[1])
+        target = os.path.join("..", file_name)
+        os.makedirs(os.path.dirname(link), exist_ok=True)
+        try:
+            os.symlink(target, link)
+        except FileExistsError:
+            if os.path.exists(link):
+                return
+            # Replace a link to a deleted file, renaming keeps lookups atomic.
+            temporary = f"{link}.{uuid4().hex}.tmp"
+            os.symlink(target, temporary)
+            os.replace(temporary, link)
+
+    def exists(self, file_name: str) -> bool:
+        return os.path.exists(self.path(file_name))
+
+    async def lookup(self, digest: str, ext: str) -> Optional[str]:
+        link = self.content_path(digest, ext)
+        # A dangling link means the file was deleted since.
+        if not os.path.exists(link):
+            return None
+        return os.path.basename(os.readlink(link))
+
+
+@lru_cache(maxsize=256)
+def http_storage(config: ConfigKey) -> HTTPStorage:
+    return HTTPStorage(config)
+
+
+@lru_cache
+def local_storage(root: str) -> LocalStorage:
+    return LocalStorage(root)
+
+
+def get_backend(config: Optional[ConfigKey] = None) -> StorageBackend:
+    """Backend selected by the host of `config`, the current one by default.
+
+    A `file://` host, e.g. `file:///var/lib/hyko/storage`, keeps files in that
+    local directory, any other host is the hyko storage API.
+    """
+    config = config or config_key()
+    if config[0].startswith("file://"):
+        return local_storage(config[0].removeprefix("file://"))
+    return http_storage(config)
+
+
+def content_digest(data: bytes) -> str:
+    """SHA-256 of stored file data, hardware accelerated on most CPUs."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ContentIndex:
+    """Names of files this process stored, by storage configuration and digest.
+
+    Lets identical outputs reuse the stored file without asking the storage.
+    Files are only reused with the credentials that stored them, another user
+    may not be allowed to read them, nor learn that the content exists.
+    """
+
+    def __init__(self, max_entries: int = 65536):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[ConfigKey, str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, digest: str, ext: str, config: Optional[ConfigKey] = None
+    ) -> Optional[str]:
+        key = (config or config_key(), digest, ext)
+        with self._lock:
+            file_name = self._entries.get(key)
+            if file_name is not None:
+                self._entries.move_to_end(key)
+            return file_name
+
+    def set(
+        self,
+        digest: str,
+        ext: str,
+        file_name: str,
+        config: Optional[ConfigKey] = None,
+    ):
+        with self._lock:
+            self._entries[(config or config_key(), digest, ext)] = file_name
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+content_index = ContentIndex()
+
+
+class DataCache:
+    """LRU cache of stored file data shared by every media object.
+
+    Stored files never change once written, their names embed a fresh UUID, so
+    entries never go stale. They are keyed by storage configuration and file
+    name, data is only shared between calls with the same credentials.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[ConfigKey, str], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, file_name: str, config: Optional[ConfigKey] = None
+    ) -> Optional[bytes]:
+        key = (config or config_key(), file_name)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return data
+
+    def set(self, file_name: str, data: bytes, config: Optional[ConfigKey] = None):
+        if len(data) > self.max_bytes:
+            return
+
+        key = (config or config_key(), file_name)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+data_cache = DataCache()
+
+REGISTRY.register(
+    CollectedCounter(
+        "hyko_storage_cache_hits_total",
+        "Reads of stored files served by the shared data cache.",
+        collect=lambda: {(): data_cache.hits},
+    )
+)
+REGISTRY.register(
+    CollectedCounter(
+        "hyko_storage_cache_misses_total",
+        "Reads of stored files that had to be downloaded.",
+        collect=lambda: {(): data_cache.misses},
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "hyko_storage_cache_bytes",
+        "Bytes held by the shared data cache.",
+        collect=lambda: {(): data_cache.size},
+    )
+)
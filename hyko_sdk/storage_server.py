@@ -0,0 +1,103 @@
+import asyncio
+import gzip
+import os
+import re
+import zlib
+from typing import Any
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, Response, status
+
+from .storage import LocalStorage, compressible_ext, content_digest
+
+_file_name = re.compile(rb'filename="([^"]+)"')
+
+
+async def request_body(request: Request) -> bytes:
+    """Body of a request, decompressed while it streams in if gzip encoded."""
+    encoding = request.headers.get("content-encoding", "identity")
+    if encoding == "identity":
+        return await request.body()
+    if encoding != "gzip":
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"unsupported content encoding {encoding}",
+            headers={"Accept-Encoding": "gzip"},
+        )
+
+    decompressor = zlib.decompressobj(wbits=31)
+    try:
+        chunks = [decompressor.decompress(chunk) async for chunk in request.stream()]
+        chunks.append(decompressor.flush())
+    except zlib.error as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"invalid gzip body. {e}"
+        ) from e
+    if not decompressor.eof:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="truncated gzip body"
+        )
+    return b"".join(chunks)
+
+
+def create_storage_app(root: str) -> FastAPI:
+    """Stand-in for the hyko storage API keeping files in a local directory.
+
+    Implements `POST /storage/`, `GET /storage/{file_name}` and the content
+    lookup `GET /storage/lookup/{digest}{ext}` on top of `LocalStorage`, for
+    offline development and benchmarks. Uploads may be gzip encoded, and
+    downloads of `compressible_ext` files are when the client accepts it.
+    """
+    storage = LocalStorage(root)
+    app = FastAPI()
+
+    @app.post("/storage/")
+    async def upload(request: Request) -> str:
+        # A single file part is sliced out of the multipart body by hand, form
+        # parsing would need python-multipart.
+        content_type = request.headers.get("content-type", "")
+        boundary = content_type.partition("boundary=")[2].encode()
+        body = await request_body(request)
+        headers, _, rest = body.partition(b"\r\n\r\n")
+        match = _file_name.search(headers)
+        end = rest.rfind(b"\r\n--" + boundary)
+        if not boundary or match is None or end < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="expected a multipart upload with one file",
+            )
+        data = rest[:end]
+        return await storage.write(match.group(1).decode(), data, content_digest(data))
+
+    @app.get("/storage/lookup/{content}")
+    async def lookup(content: str) -> str:
+        digest, ext = os.path.splitext(content)
+        file_name = await storage.lookup(digest, ext)
+        if file_name is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+        return file_name
+
+    @app.get("/storage/{file_name}")
+    async def download(file_name: str, request: Request) -> Response:
+        try:
+            data = await storage.read(file_name)
+        except HTTPException as e:
+            if e.status_code == status.HTTP_400_BAD_REQUEST:
+                raise
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND) from e
+        headers = {"Vary": "Accept-Encoding"}
+        if os.path.splitext(file_name)[1].lstrip(
+            "."
+        ) in compressible_ext and "gzip" in request.headers.get("accept-encoding", ""):
+            data = await asyncio.to_thread(gzip.compress, data, 1, mtime=0)
+            headers["Content-Encoding"] = "gzip"
+        return Response(
+            content=data, media_type="application/octet-stream", headers=headers
+        )
+
+    return app
+
+
+def serve_storage(root: str, host: str = "127.0.0.1", port: int = 8001, **kwargs: Any):
+    """Run the stand-in storage with uvicorn, point `StorageConfig.host` at it."""
+    uvicorn.run(create_storage_app(root), host=host, port=port, **kwargs)
@@ -0,0 +1,88 @@
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, ContextManager, Iterator, Optional
+
+
+class Timings:
+    """Total time spent in every span name during one call."""
+
+    def __init__(self):
+        self.durations: dict[str, float] = {}
+
+    def add(self, name: str, duration: float):
+        self.durations[name] = self.durations.get(name, 0) + duration
+
+    def header(self) -> str:
+        """Value of a `Server-Timing` header, durations in milliseconds."""
+        return ", ".join(
+            f"{name};dur={duration * 1e3:.3f}"
+            for name, duration in self.durations.items()
+        )
+
+
+_timings: ContextVar[Optional[Timings]] = ContextVar("timings", default=None)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Timings]:
+    """Collect the duration of every span entered in this context."""
+    timings = Timings()
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+class Tracing:
+    """Export spans to an OpenTelemetry compatible tracer.
+
+    Any object with `start_as_current_span(name, attributes=...)` works, such
+    as `opentelemetry.trace.get_tracer("hyko_sdk")`. Spans are no-ops while no
+    tracer is configured and no timings are collected.
+    """
+
+    tracer: Optional[Any] = None
+
+    @classmethod
+    def configure(cls, tracer: Optional[Any]):
+        cls.tracer = tracer
+
+
+class Span:
+    __slots__ = ("name", "attributes", "timings", "exported", "start")
+
+    def __init__(
+        self, name: str, attributes: dict[str, Any], timings: Optional[Timings]
+    ):
+        self.name = name
+        self.attributes = attributes
+        self.timings = timings
+        self.exported: Optional[ContextManager[Any]] = None
+
+    def __enter__(self):
+        if Tracing.tracer is not None:
+            self.exported = Tracing.tracer.start_as_current_span(
+                self.name, attributes=self.attributes
+            )
+            self.exported.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.start)
+        if self.exported is not None:
+            return self.exported.__exit__(*exc_info)
+
+
+_noop = nullcontext()
+
+
+def span(name: str, **attributes: Any) -> ContextManager[Any]:
+    """Time a phase of a call, e.g. `with span("decode", type="Image"): ...`."""
+    timings = _timings.get()
+    if timings is None and Tracing.tracer is None:
+        return _noop
+    return Span(name, attributes, timings)
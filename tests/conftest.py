@@ -15,12 +15,16 @@ from hyko_sdk.definitions import (
 )
 from hyko_sdk.io import Audio, Image, Video
 from hyko_sdk.models import CoreModel, StorageConfig
+from hyko_sdk.storage import content_index, data_cache
 from hyko_sdk.utils import field
 
 
 @pytest.fixture(autouse=True)
 def configure_settings():
     StorageConfig.configure("test", "test", "test")
+    yield
+    data_cache.clear()
+    content_index.clear()
 
 
 @pytest.fixture
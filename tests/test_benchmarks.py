@@ -0,0 +1,34 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks.storage_server import running_storage_server
+from benchmarks.suite import main
+from hyko_sdk.components.components import Ext
+from hyko_sdk.io import Image
+from hyko_sdk.models import StorageConfig
+from hyko_sdk.storage import data_cache
+
+
+@pytest.mark.asyncio
+async def test_stand_in_storage_round_trip():
+    data = os.urandom(100_000)
+    with running_storage_server() as (url, root):
+        StorageConfig.configure("token", "token", url)
+        image = Image(obj_ext=Ext.PNG)
+        await image.save(data)
+        data_cache.clear()
+
+        stored = Image(obj_ext=Ext.PNG, file_name=image.file_name)
+        assert sorted(os.listdir(root)) == [".content", image.file_name]
+        assert await stored.get_data() == data
+
+
+def test_suite_flags_regressions(tmp_path: Path):
+    baseline = os.path.join(tmp_path, "baseline.json")
+    args = ["-k", "io.validate_file_name", "--repeat", "1", "--baseline", baseline]
+
+    assert main([*args, "--save"]) == 0
+    assert main([*args, "--threshold", "10"]) == 0
+    assert main([*args, "--threshold", "-1"]) == 1
@@ -1,17 +1,39 @@
-from typing import Type
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Type
+from unittest import mock
+from uuid import uuid4
 
 import pytest
-from pydantic import BaseModel
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, Field, field_validator
 
+from hyko_sdk.cache import DiskCache, MemoryCache, MetadataCache, model_fingerprint
+from hyko_sdk.components.components import Ext
+from hyko_sdk.concurrency import NodeOverloadedError
 from hyko_sdk.definitions import (
     OnCallType,
+    Registry,
     ToolkitNode,
 )
+from hyko_sdk.io import PDF, Image
 from hyko_sdk.models import (
+    CoreModel,
+    ExecutionMode,
     FieldMetadata,
     MetaDataBase,
     StorageConfig,
+    UploadMode,
 )
+from hyko_sdk.pool import ProcessPool
+from hyko_sdk.utils import field
 
 
 # ToolkitBase Tests
@@ -79,6 +101,145 @@ def test_dump_metadata(
     assert isinstance(dumped_meta_data, str)
 
 
+def test_metadata_is_cached_until_changed(
+    sample_io_data: Type[BaseModel],
+    sample_param_data: Type[BaseModel],
+    toolkit_base: ToolkitNode,
+):
+    toolkit_base.set_param(sample_param_data)
+    metadata = toolkit_base.get_metadata()
+    dumped = toolkit_base.dump_metadata()
+
+    assert toolkit_base.get_metadata() is metadata
+    assert toolkit_base.dump_metadata() is dumped
+
+    toolkit_base.set_input(sample_io_data)
+    assert toolkit_base.get_metadata() is not metadata
+    assert set(toolkit_base.get_metadata().inputs) == set(sample_io_data.model_fields)
+
+    toolkit_base.callback(trigger="min", id="metadata_callback")
+    assert toolkit_base.get_metadata().params["min"].callback_id == "metadata_callback"
+    assert "metadata_callback" in toolkit_base.dump_metadata()
+
+
+def test_registry_metadata_json_is_cached_until_changed(toolkit_base: ToolkitNode):
+    dumped = Registry.dump_all_metadata()
+    assert Registry.dump_all_metadata() is dumped
+    assert json.loads(dumped) == [
+        metadata.model_dump(mode="json", exclude_none=True)
+        for metadata in Registry.get_all_metadata()
+    ]
+
+    toolkit_base.set_param(CoreModel)
+    assert Registry.dump_all_metadata() is not dumped
+
+    dumped = Registry.dump_all_metadata()
+    ToolkitNode(name="registry_metadata_node", description="Description")
+    assert b"registry_metadata_node" in Registry.dump_all_metadata()
+
+
+def test_metadata_cache_reuses_generated_ports(
+    tmp_path: Path,
+    sample_io_data: Type[BaseModel],
+    sample_param_data: Type[BaseModel],
+):
+    MetadataCache.configure(str(tmp_path))
+    try:
+        cold = ToolkitNode(name="metadata_cache_cold", description="Description")
+        cold.set_input(sample_io_data)
+        cold.set_param(sample_param_data)
+        cold.set_output(sample_io_data)
+        assert len(os.listdir(tmp_path)) == 3
+
+        with mock.patch("hyko_sdk.definitions.PortSchema.from_model") as from_model:
+            warm = ToolkitNode(name="metadata_cache_cold", description="Description")
+            warm.set_input(sample_io_data)
+            warm.set_param(sample_param_data)
+            warm.set_output(sample_io_data)
+        from_model.assert_not_called()
+        assert warm.dump_metadata() == cold.dump_metadata()
+
+        class Changed(sample_param_data):
+            max: int = field(description="changed")
+
+        assert model_fingerprint(Changed) != model_fingerprint(sample_param_data)
+    finally:
+        MetadataCache.configure(None)
+
+
+def test_model_fingerprint_covers_field_settings():
+    def make_params(**kwargs: Any) -> Type[BaseModel]:
+        class Params(CoreModel):
+            size: int = Field(description="size", **kwargs)
+
+        return Params
+
+    def make_extra():
+        def extra(schema: dict[str, Any]):
+            schema["component"] = "slider"
+
+        return extra
+
+    assert model_fingerprint(make_params(ge=0)) == model_fingerprint(make_params(ge=0))
+    assert model_fingerprint(make_params(ge=0)) != model_fingerprint(
+        make_params(ge=5, le=9, title="Size", examples=[6])
+    )
+    assert model_fingerprint(make_params(default_factory=lambda: 1)) != (
+        model_fingerprint(make_params(default_factory=lambda: 2))
+    )
+    # Callables are recognized across processes, not by their address.
+    assert model_fingerprint(
+        make_params(json_schema_extra=make_extra())
+    ) == model_fingerprint(make_params(json_schema_extra=make_extra()))
+
+
+lazy_node_module = """
+from hyko_sdk.definitions import ToolkitNode
+from hyko_sdk.models import CoreModel, MetaDataBase
+from hyko_sdk.utils import field
+
+lazy_node = ToolkitNode(name="lazy_node", description="Description")
+
+
+@lazy_node.set_param
+class Params(CoreModel):
+    choice: str = field(description="choice")
+
+
+@lazy_node.callback(trigger="choice", id="lazy_callback")
+async def refresh(metadata: MetaDataBase, oauth_token: str):
+    return metadata
+"""
+
+
+def test_lazy_registry_imports_declared_nodes_on_demand(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    (tmp_path / "lazy_nodes.py").write_text(lazy_node_module)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    manifest_path = str(tmp_path / "manifest.json")
+
+    Registry.write_manifest(manifest_path, ["lazy_nodes"])
+    metadata = Registry.get_handler("lazy_node").dump_metadata()
+
+    # Start over as a fresh worker that only knows the manifest.
+    monkeypatch.setattr(Registry, "_registry", {})
+    monkeypatch.setattr(Registry, "_callbacks_registry", {})
+    monkeypatch.setattr(Registry, "_declared", {})
+    monkeypatch.delitem(sys.modules, "lazy_nodes")
+    Registry.load_manifest(manifest_path)
+
+    assert json.loads(Registry.dump_all_metadata()) == [json.loads(metadata)]
+    assert "lazy_nodes" not in sys.modules
+
+    assert Registry.get_callback("lazy_callback")
+    assert "lazy_nodes" in sys.modules
+    assert Registry.get_handler("lazy_node").dump_metadata() == metadata
+
+    with pytest.raises(ValueError):
+        Registry.get_handler("missing_node")
+
+
 @pytest.mark.asyncio
 async def toolkit_test(
     toolkit_base: ToolkitNode,
@@ -105,3 +266,613 @@ async def toolkit_test(
 
     # Assert the expected result
     assert result == "test call"
+
+
+@pytest.mark.asyncio
+async def test_call_respects_max_concurrency():
+    node = ToolkitNode(
+        name="limited_node",
+        description="Description",
+        max_concurrency=2,
+    )
+    running = 0
+    peak = 0
+
+    @node.on_call
+    async def call(inputs: BaseModel, params: BaseModel):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return CoreModel()
+
+    storage_config = StorageConfig(
+        refresh_token="test", access_token="test", host="test"
+    )
+    await asyncio.gather(*(node.call({}, {}, storage_config) for _ in range(6)))
+
+    assert peak == 2
+    assert node.admission
+    stats = node.admission.stats()
+    assert stats.admitted == 6
+    assert stats.in_flight == 0
+    assert stats.queue_depth == 0
+
+
+def test_max_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        ToolkitNode(
+            name="zero_concurrency_node", description="Description", max_concurrency=0
+        )
+
+
+@pytest.mark.asyncio
+async def test_call_sheds_load_when_queue_is_full():
+    node = ToolkitNode(
+        name="shedding_node",
+        description="Description",
+        max_concurrency=1,
+        max_queue_size=1,
+    )
+    release = asyncio.Event()
+
+    @node.on_call
+    async def call(inputs: BaseModel, params: BaseModel):
+        await release.wait()
+        return CoreModel()
+
+    storage_config = StorageConfig(
+        refresh_token="test", access_token="test", host="test"
+    )
+    running = asyncio.create_task(node.call({}, {}, storage_config))
+    queued = asyncio.create_task(node.call({}, {}, storage_config))
+    await asyncio.sleep(0)
+
+    with pytest.raises(NodeOverloadedError):
+        await node.call({}, {}, storage_config)
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert node.admission
+    assert node.admission.stats().rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_call_times_out_in_queue():
+    node = ToolkitNode(
+        name="timeout_node",
+        description="Description",
+        max_concurrency=1,
+        queue_timeout=0.01,
+    )
+
+    @node.on_call
+    async def call(inputs: BaseModel, params: BaseModel):
+        await asyncio.sleep(0.1)
+        return CoreModel()
+
+    storage_config = StorageConfig(
+        refresh_token="test", access_token="test", host="test"
+    )
+    running = asyncio.create_task(node.call({}, {}, storage_config))
+    await asyncio.sleep(0)
+
+    with pytest.raises(NodeOverloadedError):
+        await node.call({}, {}, storage_config)
+
+    await running
+    assert node.admission
+    stats = node.admission.stats()
+    assert stats.timed_out == 1
+    assert stats.in_flight == 0
+    assert stats.max_wait_time > 0
+
+
+process_node = ToolkitNode(
+    name="process_node",
+    description="Description",
+    execution_mode=ExecutionMode.PROCESS,
+)
+
+
+@process_node.set_input
+class ProcessInputs(CoreModel):
+    value: int = field(description="value")
+
+
+@process_node.set_output
+class ProcessOutputs(CoreModel):
+    value: int = field(description="value")
+    pid: int = field(description="pid of the worker")
+
+
+@process_node.on_call
+async def process_call(inputs: ProcessInputs, params: CoreModel):
+    if inputs.value < 0:
+        raise HTTPException(status_code=404, detail="missing")
+    if inputs.value == 0:
+        os._exit(1)
+    return ProcessOutputs(value=inputs.value * 2, pid=os.getpid())
+
+
+@pytest.mark.asyncio
+async def test_call_in_process_pool():
+    ProcessPool.start(max_workers=1, mp_context=multiprocessing.get_context("fork"))
+    try:
+        result = await process_node.call(
+            inputs={"value": 21},
+            params={},
+            storage_config=StorageConfig(
+                refresh_token="test", access_token="test", host="test"
+            ),
+        )
+    finally:
+        ProcessPool.shutdown()
+
+    assert isinstance(result, ProcessOutputs)
+    assert result.value == 42
+    assert result.pid != os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_process_pool_survives_failing_calls():
+    storage_config = StorageConfig(
+        refresh_token="test", access_token="test", host="test"
+    )
+    ProcessPool.start(max_workers=1, mp_context=multiprocessing.get_context("fork"))
+    try:
+        with pytest.raises(HTTPException) as error:
+            await process_node.call({"value": -1}, {}, storage_config)
+        assert error.value.status_code == 404
+        assert error.value.detail == "missing"
+
+        with pytest.raises(BrokenProcessPool):
+            await process_node.call({"value": 0}, {}, storage_config)
+
+        result = await process_node.call({"value": 1}, {}, storage_config)
+        assert result.value == 2
+    finally:
+        ProcessPool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_node_warmup_keeps_the_loop_running():
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    def start(*args: Any, **kwargs: Any):
+        time.sleep(0.1)
+
+    ticker = asyncio.create_task(tick())
+    with (
+        mock.patch.object(ProcessPool, "start", side_effect=start),
+        mock.patch.object(ProcessPool, "run", new=mock.AsyncMock()),
+    ):
+        await process_node.warmup(CoreModel())
+    ticker.cancel()
+
+    assert ticks > 3
+
+
+def test_process_node_needs_output_model():
+    node = ToolkitNode(
+        name="process_without_outputs",
+        description="Description",
+        execution_mode=ExecutionMode.PROCESS,
+    )
+
+    async def call(inputs: CoreModel, params: CoreModel):
+        return CoreModel()
+
+    with pytest.raises(ValueError, match="set_output"):
+        node.on_call(call)
+    assert node._call is None
+
+
+def test_process_pool_rejects_main_nodes_without_fork():
+    ProcessPool.add_module("__main__")
+    try:
+        with pytest.raises(RuntimeError):
+            ProcessPool.start(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            )
+    finally:
+        ProcessPool._uses_main = False
+
+
+@pytest.mark.asyncio
+async def test_registry_warmup_caps_concurrency():
+    running = 0
+    peak = 0
+    warmed_up: list[int] = []
+
+    class WarmupParams(CoreModel):
+        size: int = field(description="size", default=1)
+
+    names = [f"warmup_node_{i}" for i in range(5)]
+    for name in names:
+        node = ToolkitNode(name=name, description="Description")
+        node.set_param(WarmupParams)
+
+        @node.on_startup
+        async def startup(params: WarmupParams):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        @node.on_warmup
+        async def warmup(params: WarmupParams):
+            warmed_up.append(params.size)
+
+    await Registry.warmup(names, {"warmup_node_0": {"size": 3}}, max_concurrency=2)
+
+    assert peak == 2
+    assert sorted(warmed_up) == [1, 1, 1, 1, 3]
+    assert all(Registry.get_handler(name).started for name in names)
+
+
+class ImageOutputs(CoreModel):
+    image: Image = field(description="image")
+
+
+def make_cached_node(name: str, **kwargs: Any):
+    node = ToolkitNode(name=name, description="Description", cacheable=True, **kwargs)
+    calls: list[int] = []
+
+    @node.set_input
+    class Inputs(CoreModel):
+        value: int = field(description="value")
+
+    @node.set_output
+    class Outputs(CoreModel):
+        value: int = field(description="value")
+
+    @node.on_call
+    async def call(inputs: Inputs, params: CoreModel):
+        calls.append(inputs.value)
+        return Outputs(value=inputs.value + 1)
+
+    return node, calls
+
+
+@pytest.mark.asyncio
+async def test_cacheable_node_serves_repeated_calls():
+    node, calls = make_cached_node("cached_node")
+    storage_config = StorageConfig(
+        refresh_token="test", access_token="test", host="test"
+    )
+
+    first = await node.call({"value": 1}, {}, storage_config)
+    second = await node.call({"value": 1}, {}, storage_config)
+    await node.call({"value": 2}, {}, storage_config)
+
+    assert first == second
+    assert calls == [1, 2]
+    assert node.cache is not None
+    stats = node.cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 2, 2)
+
+
+@pytest.mark.asyncio
+async def test_cacheable_node_caches_per_user():
+    node, calls = make_cached_node("per_user_cached_node")
+
+    for access_token in ("first", "second", "first"):
+        await node.call(
+            {"value": 1},
+            {},
+            StorageConfig(refresh_token="test", access_token=access_token, host="test"),
+        )
+
+    assert calls == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_keeps_media_by_file_name():
+    cache = MemoryCache(model=ImageOutputs)
+    image = Image(obj_ext=Ext.PNG, file_name=f"{uuid4()}.png")
+    image.cached_value = b"data"
+    await cache.set("key", ImageOutputs(image=image))
+
+    cached = await cache.get("key")
+    assert isinstance(cached, ImageOutputs)
+    assert cached.image.file_name == image.file_name
+    assert cached.image.cached_value is None
+
+
+@pytest.mark.asyncio
+async def test_cacheable_node_evicts_and_expires():
+    node, calls = make_cached_node("lru_node", cache_size=1, cache_ttl=60)
+    storage_config = StorageConfig(
+        refresh_token="test", access_token="test", host="test"
+    )
+
+    await node.call({"value": 1}, {}, storage_config)
+    await node.call({"value": 2}, {}, storage_config)
+    await node.call({"value": 1}, {}, storage_config)
+    assert calls == [1, 2, 1]
+    assert node.cache is not None
+    assert node.cache.stats().evictions == 2
+
+    node.cache.ttl = 0
+    await node.call({"value": 1}, {}, storage_config)
+    assert calls == [1, 2, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_cacheable_node_on_disk(tmp_path: Path):
+    storage_config = StorageConfig(
+        refresh_token="test", access_token="test", host="test"
+    )
+    node, calls = make_cached_node("disk_cached_node", cache_dir=str(tmp_path))
+    first = await node.call({"value": 1}, {}, storage_config)
+
+    # A new process sees the entries written by the previous one.
+    node, calls = make_cached_node("disk_cached_node", cache_dir=str(tmp_path))
+    second = await node.call({"value": 1}, {}, storage_config)
+
+    assert calls == []
+    assert second.model_dump() == first.model_dump()
+
+
+@pytest.mark.asyncio
+async def test_cacheable_nodes_sharing_a_directory(tmp_path: Path):
+    storage_config = StorageConfig(
+        refresh_token="test", access_token="test", host="test"
+    )
+    first, first_calls = make_cached_node(
+        "shared_dir_node_0", cache_dir=str(tmp_path), cache_size=1
+    )
+    second, second_calls = make_cached_node(
+        "shared_dir_node_1", cache_dir=str(tmp_path), cache_size=1
+    )
+
+    for node in (first, second, first, second):
+        await node.call({"value": 1}, {}, storage_config)
+
+    assert first_calls == second_calls == [1]
+    for node in (first, second):
+        assert node.cache is not None
+        assert node.cache.stats().evictions == 0
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_drops_malformed_entries(tmp_path: Path):
+    for key, entry in (("missing", "{}"), ("invalid", '{"created_at": 0}')):
+        (tmp_path / f"{key}.json").write_text(entry)
+    cache = DiskCache(directory=str(tmp_path), model=ImageOutputs)
+
+    assert await cache.get("missing") is None
+    assert await cache.get("invalid") is None
+    assert len(cache) == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cacheable_node_needs_output_model():
+    node = ToolkitNode(
+        name="cacheable_without_outputs", description="Description", cacheable=True
+    )
+
+    async def call(inputs: CoreModel, params: CoreModel):
+        return CoreModel()
+
+    with pytest.raises(ValueError, match="set_output"):
+        node.on_call(call)
+
+
+@pytest.mark.asyncio
+async def test_call_stream_with_async_generator_handler():
+    node = ToolkitNode(name="streaming_node", description="Description")
+
+    @node.set_output
+    class Outputs(CoreModel):
+        text: str = field(description="text")
+
+    @node.on_call
+    async def call(inputs: CoreModel, params: CoreModel):
+        text = ""
+        for token in ["a", "b", "c"]:
+            text += token
+            yield Outputs(text=text)
+
+    storage_config = StorageConfig(
+        refresh_token="test", access_token="test", host="test"
+    )
+
+    assert node.streaming
+    partials = [outputs async for outputs in node.call_stream({}, {}, storage_config)]
+    assert [outputs.text for outputs in partials] == ["a", "ab", "abc"]
+
+    final = await node.call({}, {}, storage_config)
+    assert final.text == "abc"
+
+
+@pytest.mark.asyncio
+async def test_lazy_uploads_only_store_returned_outputs(
+    mock_post_success: mock.MagicMock,
+):
+    node = ToolkitNode(
+        name="lazy_node",
+        description="Description",
+        upload_mode=UploadMode.LAZY,
+    )
+    produced: list[str] = []
+
+    @node.set_output
+    class Outputs(CoreModel):
+        document: PDF = field(description="document")
+
+    @node.on_call
+    async def call(inputs: CoreModel, params: CoreModel):
+        draft = await PDF(obj_ext=Ext.PDF).init_from_val(b"draft")
+        unused = await PDF(obj_ext=Ext.PDF).init_from_producer(
+            lambda: produced.append("unused") or b"unused"
+        )
+        final = await PDF(obj_ext=Ext.PDF).init_from_producer(
+            lambda: produced.append("final") or b"final"
+        )
+        assert draft.pending and unused.pending
+        mock_post_success.assert_not_called()
+        return Outputs(document=final)
+
+    storage_config = StorageConfig(
+        refresh_token="test", access_token="test", host="test"
+    )
+    outputs = await node.call({}, {}, storage_config)
+
+    assert produced == ["final"]
+    mock_post_success.assert_called_once()
+    assert outputs.document.get_name() == "test_filename"
+
+
+@pytest.mark.asyncio
+async def test_background_uploads_overlap_with_handler(sample_nd_array_data: Any):
+    node = ToolkitNode(
+        name="background_node",
+        description="Description",
+        upload_mode=UploadMode.BACKGROUND,
+    )
+    events: list[str] = []
+
+    @node.set_output
+    class Outputs(CoreModel):
+        images: list[Image] = field(description="images")
+
+    async def slow_save(self: Image, obj_data: bytes):
+        events.append("upload started")
+        await asyncio.sleep(0.01)
+        events.append("upload done")
+
+    @node.on_call
+    async def call(inputs: CoreModel, params: CoreModel):
+        first = await Image.from_ndarray(sample_nd_array_data)
+        await asyncio.sleep(0.05)
+        events.append("computing second")
+        second = await Image.from_ndarray(sample_nd_array_data)
+        return Outputs(images=[first, second])
+
+    storage_config = StorageConfig(
+        refresh_token="test", access_token="test", host="test"
+    )
+    with mock.patch.object(Image, "save", slow_save):
+        outputs = await node.call({}, {}, storage_config)
+
+    assert events.index("upload started") < events.index("computing second")
+    assert events.count("upload done") == 2
+    assert not any(image.pending for image in outputs.images)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_keep_their_storage_config(
+    tmp_path: Path, sample_nd_array_data: Any
+):
+    node = ToolkitNode(name="concurrent_users_node", description="Description")
+
+    @node.set_input
+    class Inputs(CoreModel):
+        delay: float = field(description="delay")
+
+    @node.set_output
+    class Outputs(CoreModel):
+        image: Image = field(description="image")
+
+    @node.on_call
+    async def call(inputs: Inputs, params: CoreModel):
+        await asyncio.sleep(inputs.delay)
+        return Outputs(image=await Image.from_ndarray(sample_nd_array_data))
+
+    def config(user: str):
+        return StorageConfig(
+            refresh_token=user, access_token=user, host=f"file://{tmp_path / user}"
+        )
+
+    # Bob is configured last but alice's handler creates its image after him.
+    alice, bob = await asyncio.gather(
+        node.call({"delay": 0.05}, {}, config("alice")),
+        node.call({"delay": 0.01}, {}, config("bob")),
+    )
+
+    assert alice.image.storage.root == str(tmp_path / "alice")
+    assert bob.image.storage.root == str(tmp_path / "bob")
+    assert (tmp_path / "alice" / alice.image.get_name()).exists()
+    assert (tmp_path / "bob" / bob.image.get_name()).exists()
+    assert StorageConfig.host == "test"
+
+
+def test_identical_params_are_validated_once():
+    node = ToolkitNode(
+        name="params_cache_node", description="Description", params_cache_size=2
+    )
+    validated: list[int] = []
+
+    @node.set_param
+    class Params(CoreModel):
+        size: int = field(description="size")
+
+        @field_validator("size")
+        @classmethod
+        def count(cls, size: int):
+            validated.append(size)
+            return size
+
+    first = node.validate_params({"size": 1})
+    second = node.validate_params({"size": 1})
+    node.validate_params({"size": 2})
+    assert validated == [1, 2]
+    assert first == second and first is not second
+
+    node.validate_params({"size": 3})
+    node.validate_params({"size": 1})
+    assert validated == [1, 2, 3, 1]
+
+    node.set_param(Params)
+    node.validate_params({"size": 1})
+    assert validated == [1, 2, 3, 1, 1]
+
+
+def test_validate_json():
+    node = ToolkitNode(name="validate_json_node", description="Description")
+
+    @node.set_input
+    class Inputs(CoreModel):
+        images: list[Image] = field(description="images")
+
+    @node.set_param
+    class Params(CoreModel):
+        size: int = field(description="size", default=1)
+
+    names = [f"5c3c1ab0-e6d8-4e8d-9c3b-6bb7e5c0f1e{i}.png" for i in range(3)]
+    inputs, params, storage_config = node.validate_json(
+        json.dumps(
+            {
+                "inputs": {"images": names},
+                "storage_config": {
+                    "refresh_token": "token",
+                    "access_token": "token",
+                    "host": "json-host",
+                },
+            }
+        )
+    )
+    assert [image.file_name for image in inputs.images] == names  # type: ignore
+    assert params == Params(size=1)
+    assert storage_config.host == "json-host"
+    # Media inputs are bound to the configuration of the request, the process
+    # wide fallback is left alone.
+    assert StorageConfig.host == "test"
+    assert inputs.images[0].storage.host == "json-host"  # type: ignore
+
+    with pytest.raises(RequestValidationError) as e:
+        node.validate_json(b'{"inputs": {"images": ["a.png"]}}')
+    assert {error["loc"][0] for error in e.value.errors()} == {
+        "inputs",
+        "storage_config",
+    }
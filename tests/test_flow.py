@@ -0,0 +1,247 @@
+import asyncio
+import multiprocessing
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from hyko_sdk.definitions import ToolkitNode
+from hyko_sdk.flow import Edge, Flow, FlowNode, run_flow
+from hyko_sdk.io import Image
+from hyko_sdk.models import CoreModel, ExecutionMode, StorageConfig
+from hyko_sdk.pool import ProcessPool
+from hyko_sdk.utils import field
+
+storage_config = StorageConfig(refresh_token="test", access_token="test", host="test")
+
+
+class Number(CoreModel):
+    value: int = field(description="value")
+
+
+class Pair(CoreModel):
+    left: int = field(description="left")
+    right: int = field(description="right")
+
+
+class Picture(CoreModel):
+    image: Image = field(description="image")
+
+
+add_one = ToolkitNode(name="flow_add_one", description="Description")
+add_one.set_input(Number)
+add_one.set_output(Number)
+
+add = ToolkitNode(name="flow_add", description="Description")
+add.set_input(Pair)
+add.set_output(Number)
+
+make_image = ToolkitNode(name="flow_make_image", description="Description")
+make_image.set_output(Picture)
+
+invert_image = ToolkitNode(name="flow_invert_image", description="Description")
+invert_image.set_input(Picture)
+invert_image.set_output(Picture)
+
+invert_image_in_process = ToolkitNode(
+    name="flow_invert_image_in_process",
+    description="Description",
+    execution_mode=ExecutionMode.PROCESS,
+)
+invert_image_in_process.set_input(Picture)
+invert_image_in_process.set_output(Picture)
+
+
+@add_one.on_call
+async def add_one_call(inputs: Number, params: CoreModel):
+    await asyncio.sleep(0.01)
+    return Number(value=inputs.value + 1)
+
+
+@add.on_call
+async def add_call(inputs: Pair, params: CoreModel):
+    return Number(value=inputs.left + inputs.right)
+
+
+@make_image.on_call
+async def make_image_call(inputs: CoreModel, params: CoreModel):
+    return Picture(image=await Image.from_ndarray(np.zeros((4, 4, 3), dtype=np.uint8)))
+
+
+@invert_image.on_call
+async def invert_image_call(inputs: Picture, params: CoreModel):
+    arr = await inputs.image.to_ndarray()
+    return Picture(image=await Image.from_ndarray(255 - arr))
+
+
+@invert_image_in_process.on_call
+async def invert_image_in_process_call(inputs: Picture, params: CoreModel):
+    arr = await inputs.image.to_ndarray()
+    return Picture(image=await Image.from_ndarray(255 - arr))
+
+
+@pytest.mark.asyncio
+async def test_run_flow_diamond():
+    flow = Flow(
+        nodes=[
+            FlowNode(id="a", name="flow_add_one", inputs={"value": 1}),
+            FlowNode(id="b", name="flow_add_one"),
+            FlowNode(id="c", name="flow_add_one"),
+            FlowNode(id="d", name="flow_add"),
+        ],
+        edges=[
+            Edge(source="a", source_output="value", target="b", target_input="value"),
+            Edge(source="a", source_output="value", target="c", target_input="value"),
+            Edge(source="b", source_output="value", target="d", target_input="left"),
+            Edge(source="c", source_output="value", target="d", target_input="right"),
+        ],
+    )
+
+    results = await run_flow(flow, storage_config)
+
+    assert list(results) == ["d"]
+    assert results["d"].value == 6
+
+
+def test_flow_rejects_cycles():
+    with pytest.raises(ValidationError):
+        Flow(
+            nodes=[
+                FlowNode(id="a", name="flow_add_one"),
+                FlowNode(id="b", name="flow_add_one"),
+            ],
+            edges=[
+                Edge(
+                    source="a", source_output="value", target="b", target_input="value"
+                ),
+                Edge(
+                    source="b", source_output="value", target="a", target_input="value"
+                ),
+            ],
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "name, edge, error",
+    [
+        (
+            "flow_missing",
+            Edge(source="a", source_output="value", target="b", target_input="value"),
+            "not found",
+        ),
+        (
+            "flow_add_one",
+            Edge(source="a", source_output="valeu", target="b", target_input="value"),
+            "no output valeu",
+        ),
+        (
+            "flow_add_one",
+            Edge(source="a", source_output="value", target="b", target_input="valeu"),
+            "no input valeu",
+        ),
+    ],
+)
+async def test_run_flow_checks_nodes_and_ports_first(name: str, edge: Edge, error: str):
+    flow = Flow(
+        nodes=[
+            FlowNode(id="a", name="flow_add_one", inputs={"value": 1}),
+            FlowNode(id="b", name=name),
+        ],
+        edges=[edge],
+    )
+
+    with mock.patch.object(add_one, "run") as run:
+        with pytest.raises(ValueError, match=error):
+            await run_flow(flow, storage_config)
+    run.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_flow_keeps_media_in_memory(mock_post_success: mock.MagicMock):
+    flow = Flow(
+        nodes=[
+            FlowNode(id="make", name="flow_make_image"),
+            FlowNode(id="invert", name="flow_invert_image"),
+        ],
+        edges=[
+            Edge(
+                source="make",
+                source_output="image",
+                target="invert",
+                target_input="image",
+            ),
+        ],
+    )
+
+    with mock.patch("httpx.AsyncClient.get") as mock_get:
+        results = await run_flow(flow, storage_config)
+
+    mock_get.assert_not_called()
+    # Only the boundary output is uploaded.
+    assert mock_post_success.call_count == 1
+    assert (await results["invert"].image.to_ndarray() == 255).all()
+
+
+@pytest.mark.asyncio
+async def test_run_flow_uploads_media_for_process_nodes(tmp_path: Path):
+    flow = Flow(
+        nodes=[
+            FlowNode(id="make", name="flow_make_image"),
+            FlowNode(id="invert", name="flow_invert_image_in_process"),
+        ],
+        edges=[
+            Edge(
+                source="make",
+                source_output="image",
+                target="invert",
+                target_input="image",
+            ),
+        ],
+    )
+
+    ProcessPool.start(max_workers=1, mp_context=multiprocessing.get_context("fork"))
+    try:
+        results = await run_flow(
+            flow,
+            StorageConfig(
+                refresh_token="test", access_token="test", host=f"file://{tmp_path}"
+            ),
+        )
+    finally:
+        ProcessPool.shutdown()
+
+    assert (await results["invert"].image.to_ndarray() == 255).all()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_flows_keep_their_storage_config(tmp_path: Path):
+    flow = Flow(
+        nodes=[
+            FlowNode(id="make", name="flow_make_image"),
+            FlowNode(id="invert", name="flow_invert_image"),
+        ],
+        edges=[
+            Edge(
+                source="make",
+                source_output="image",
+                target="invert",
+                target_input="image",
+            ),
+        ],
+    )
+
+    def config(user: str):
+        return StorageConfig(
+            refresh_token=user, access_token=user, host=f"file://{tmp_path / user}"
+        )
+
+    alice, bob = await asyncio.gather(
+        run_flow(flow, config("alice")), run_flow(flow, config("bob"))
+    )
+
+    for user, results in (("alice", alice), ("bob", bob)):
+        image = results["invert"].image
+        assert (tmp_path / user / image.get_name()).exists()
@@ -1,12 +1,16 @@
+import io
 from typing import Any
 from unittest import mock
 
 import numpy as np
 import pytest
+import soundfile  # type: ignore
 from PIL import Image as PIL_Image
+from pydantic import TypeAdapter, ValidationError
 
 from hyko_sdk.components.components import Ext
-from hyko_sdk.io import Audio, Image
+from hyko_sdk.io import CSV, Audio, HykoBaseType, Image, persist, upload_scope
+from hyko_sdk.models import UploadMode
 
 
 @pytest.mark.asyncio
@@ -94,3 +98,164 @@ async def test_audio_convert(
         val=sample_audio_data.tobytes()
     )
     assert isinstance(await audio.convert_to(new_ext), Audio)  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_img_keeps_decoded_array_until_serialized(
+    sample_nd_array_data: np.ndarray[Any, Any],
+):
+    with (
+        mock.patch("httpx.AsyncClient.post") as mock_post,
+        mock.patch("httpx.AsyncClient.get") as mock_get,
+        upload_scope(UploadMode.LAZY),
+    ):
+        img = await Image.from_ndarray(sample_nd_array_data)
+        resized = await Image.from_ndarray((await img.to_ndarray())[:50, :50])
+        cropped = await Image.from_ndarray((await resized.to_ndarray())[:10])
+
+    mock_post.assert_not_called()
+    mock_get.assert_not_called()
+    assert cropped.pending
+
+    with mock.patch("httpx.Client.post") as mock_sync_post:
+        mock_sync_post.return_value = mock.Mock(is_success=True, json=lambda: "stored")
+        with mock.patch.object(Image, "encode", wraps=cropped.encode) as encode:
+            assert cropped.get_name() == "stored"
+
+    encode.assert_called_once()
+    assert not cropped.pending
+
+
+@pytest.mark.asyncio
+async def test_img_from_ndarray_is_stored_eagerly(
+    mock_post_success: mock.MagicMock, sample_nd_array_data: np.ndarray[Any, Any]
+):
+    img = await Image.from_ndarray(sample_nd_array_data)
+
+    mock_post_success.assert_called_once()
+    assert not img.pending
+    assert img.file_name == "test_filename"
+    # The array is still at hand, reading it back decodes nothing.
+    assert (await img.to_ndarray() == sample_nd_array_data).all()
+
+
+@pytest.mark.asyncio
+async def test_img_from_reused_buffer(mock_post_success: mock.MagicMock):
+    buffer = np.zeros((4, 4, 3), dtype=np.uint8)
+    images: list[Image] = []
+    for value in (10, 20, 30):
+        buffer[:] = value
+        images.append(await Image.from_ndarray(buffer))
+
+    assert [int((await img.to_ndarray())[0, 0, 0]) for img in images] == [10, 20, 30]
+
+
+@pytest.mark.asyncio
+async def test_img_decodes_stored_data_once(mock_get_png: mock.MagicMock):
+    img = Image(obj_ext=Ext.PNG, file_name="7a5ab22a-68ce-11ec-83d7-0242ac130002.png")
+
+    first = await img.to_ndarray()
+    second = await img.to_ndarray()
+
+    mock_get_png.assert_called_once()
+    assert (first == second).all()
+    assert isinstance(await img.to_pil(), PIL_Image.Image)
+
+
+@pytest.mark.asyncio
+async def test_audio_keeps_decoded_waveform(
+    sample_audio_data: np.ndarray[Any, Any], mock_post_success: mock.MagicMock
+):
+    audio = await Audio.from_ndarray(sample_audio_data, 16000)
+
+    waveform, sample_rate = await audio.to_ndarray(frame_offset=10, num_frames=100)
+
+    assert sample_rate == 16000
+    assert waveform.shape == (100, 1)
+    assert np.allclose(waveform[:, 0], sample_audio_data[10:110])
+
+
+@pytest.mark.asyncio
+async def test_audio_to_ndarray_returns_a_copy(
+    sample_audio_data: np.ndarray[Any, Any],
+):
+    file = io.BytesIO()
+    soundfile.write(file, sample_audio_data, samplerate=16000, format="WAV")  # type: ignore
+    audio = Audio(obj_ext=Ext.WAV)
+    audio.cached_value = file.getvalue()
+
+    async def convert_to(self: Audio, new_ext: Ext) -> Audio:
+        return self
+
+    with mock.patch.object(Audio, "convert_to", convert_to):
+        waveform, _ = await audio.to_ndarray()
+        waveform *= 0
+
+        waveform, _ = await audio.to_ndarray()
+    assert np.abs(waveform).max() > 0
+    assert not (await audio.decode())[0].flags.writeable
+
+
+@pytest.mark.asyncio
+async def test_media_without_codec_decode_to_file_data(
+    mock_post_success: mock.MagicMock,
+):
+    csv = await CSV(obj_ext=Ext.CSV).init_from_val(b"a,b\n1,2\n")
+    assert await csv.decode() == b"a,b\n1,2\n"
+
+    with upload_scope(UploadMode.LAZY):
+        csv = await CSV(obj_ext=Ext.CSV).init_from_decoded(b"c,d\n")
+    assert await csv.get_data() == b"c,d\n"
+
+
+@pytest.mark.parametrize(
+    "media_type, file_name, valid",
+    [
+        (Image, "7a5ab22a-68ce-11ec-83d7-0242ac130002.png", True),
+        (Image, "7a5ab22a-68ce-11ec-83d7-0242ac130002_crop.v2.jpg", True),
+        (Image, "7A5AB22A68CE11EC83D70242AC130002.webp", True),
+        (Image, "{7a5ab22a-68ce-11ec-83d7-0242ac130002}.png", True),
+        (Image, "7a5ab22a-68ce-11ec-83d7-0242ac130002.mp3", False),
+        (Image, "7a5ab22a-68ce-11ec-83d7-0242ac130002.exe", False),
+        (Image, "not-a-uuid.png", False),
+        (Audio, "7a5ab22a-68ce-11ec-83d7-0242ac130002.webm", True),
+        (CSV, "7a5ab22a-68ce-11ec-83d7-0242ac130002.csv", True),
+        (CSV, "7a5ab22a-68ce-11ec-83d7-0242ac130002.pdf", False),
+    ],
+)
+def test_validate_file_name(
+    media_type: type[HykoBaseType], file_name: str, valid: bool
+):
+    adapter = TypeAdapter(media_type)
+    if valid:
+        value = adapter.validate_json(f'"{file_name}"')
+        assert type(value) is media_type
+        assert value.file_name == file_name
+        assert value._state is None
+        assert not hasattr(value, "__dict__")
+    else:
+        with pytest.raises(ValidationError):
+            adapter.validate_json(f'"{file_name}"')
+
+
+@pytest.mark.asyncio
+async def test_media_share_client_and_downloaded_data(mock_get_png: mock.MagicMock):
+    name = "7a5ab22a-68ce-11ec-83d7-0242ac130002.png"
+    first = Image(obj_ext=Ext.PNG, file_name=name)
+    second = Image(obj_ext=Ext.PNG, file_name=name)
+
+    assert first.client is second.client
+    assert await first.get_data() == await second.get_data()
+    mock_get_png.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_persist_uploads_nested_pending_media(
+    mock_post_success: mock.MagicMock, sample_nd_array_data: np.ndarray[Any, Any]
+):
+    image = await Image.from_ndarray(sample_nd_array_data)
+    stored = Image(obj_ext=Ext.PNG)
+    await persist({"texts": ["a"] * 100, "images": [(stored, image)]})
+
+    assert mock_post_success.call_count == 1
+    assert not image.pending
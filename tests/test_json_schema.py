@@ -0,0 +1,89 @@
+from enum import Enum
+from typing import Any, Optional, Type
+
+import pytest
+from pydantic import BaseModel
+from pydantic.json_schema import GenerateJsonSchema
+
+from hyko_sdk.components.components import ListComponent, NumberField, Slider
+from hyko_sdk.io import Audio, Image
+from hyko_sdk.json_schema import (
+    CustomJsonSchema,
+    JsonSchemaGenerator,
+    JsonSchemaGeneratorWithComponents,
+    PortSchema,
+)
+from hyko_sdk.models import CoreModel, FieldMetadata
+from hyko_sdk.utils import field
+
+
+class Color(str, Enum):
+    RED = "red"
+    GREEN = "green"
+
+
+class Point(CoreModel):
+    x: int = field(description="x")
+    label: str = field(description="label", component=Slider(leq=1, geq=0))
+    color: Color = field(description="color")
+
+
+class Ports(CoreModel):
+    number: int = field(description="number", default=3)
+    text: str = field(description="text")
+    flag: bool = field(description="flag", default=True)
+    image: Image = field(description="image")
+    audio: Optional[Audio] = field(description="audio")
+    color: Color = field(description="color", default=Color.GREEN)
+    point: Point = field(description="point")
+    numbers: list[float] = field(description="numbers")
+    grid: list[list[int]] = field(description="grid")
+    anything: list[Any] = field(description="anything")
+    points: list[Point] = field(description="points")
+    nested_points: list[list[Point]] = field(description="nested points")
+    images: list[Image] = field(description="images")
+    slider: int = field(description="slider", component=Slider(leq=10, geq=0))
+    custom: list[int] = field(
+        description="custom",
+        component=ListComponent(item_component=NumberField(placeholder="n")),
+    )
+    secret: str = field(description="secret", hidden=True)
+    renamed: str = field(description="renamed", alias="Renamed")
+
+
+def legacy_fields(model: Type[BaseModel], schema_generator: type[GenerateJsonSchema]):
+    schema = CustomJsonSchema.model_validate(
+        model.model_json_schema(
+            schema_generator=schema_generator, ref_template="{model}"
+        )
+    )
+    return {
+        name: FieldMetadata(name=name, **prop.model_dump()).model_dump(mode="json")
+        for name, prop in schema.properties.items()
+    }
+
+
+@pytest.mark.parametrize(
+    "components, schema_generator",
+    [
+        (True, JsonSchemaGeneratorWithComponents),
+        (False, JsonSchemaGenerator),
+    ],
+)
+def test_port_schema_matches_json_schema_generators(
+    components: bool, schema_generator: type[GenerateJsonSchema]
+):
+    ports = PortSchema.from_model(Ports, components=components).fields()
+
+    assert {
+        name: FieldMetadata(name=name, **port).model_dump(mode="json")
+        for name, port in ports.items()
+    } == legacy_fields(Ports, schema_generator)
+
+
+def test_port_schema_rejects_list_of_enums():
+    class Colors(CoreModel):
+        colors: list[Color] = field(description="colors")
+
+    with pytest.raises(AssertionError):
+        PortSchema.from_model(Colors).fields()
@@ -0,0 +1,129 @@
+import asyncio
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hyko_sdk.concurrency import NodeOverloadedError
+from hyko_sdk.definitions import ToolkitNode
+from hyko_sdk.io import Image
+from hyko_sdk.metrics import (
+    REGISTRY,
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    codec_duration,
+    node_call_duration,
+    node_calls,
+    node_in_flight,
+    node_queue_wait_duration,
+    storage_written_bytes,
+)
+from hyko_sdk.models import CoreModel, StorageConfig
+from hyko_sdk.utils import field
+
+metered_node = ToolkitNode(name="metered_node", description="Description")
+
+
+@metered_node.set_input
+class MeteredInputs(CoreModel):
+    fail: bool = field(description="fail", default=False)
+
+
+@metered_node.set_output
+class MeteredOutputs(CoreModel):
+    image: Image = field(description="image")
+
+
+@metered_node.on_call
+async def metered_call(inputs: MeteredInputs, params: CoreModel):
+    if inputs.fail:
+        raise RuntimeError("failed")
+    return MeteredOutputs(
+        image=await Image.from_ndarray(np.zeros((8, 8, 3), dtype=np.uint8))
+    )
+
+
+def test_render_text_exposition_format():
+    registry = MetricsRegistry()
+    calls = registry.register(Counter("calls_total", "Calls.", ("node",)))
+    latency = registry.register(
+        Histogram("latency_seconds", "Latency.", ("node",), buckets=(0.1, 1))
+    )
+    calls.inc(node='say "hi"')
+    latency.observe(0.5, node="a")
+    latency.observe(2, node="a")
+
+    assert registry.render().splitlines() == [
+        "# HELP calls_total Calls.",
+        "# TYPE calls_total counter",
+        'calls_total{node="say \\"hi\\""} 1',
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{node="a",le="0.1"} 0',
+        'latency_seconds_bucket{node="a",le="1"} 1',
+        'latency_seconds_bucket{node="a",le="+Inf"} 2',
+        'latency_seconds_sum{node="a"} 2.5',
+        'latency_seconds_count{node="a"} 2',
+    ]
+
+    with pytest.raises(ValueError):
+        registry.register(Counter("calls_total", "Calls."))
+
+
+@pytest.mark.asyncio
+async def test_node_call_metrics(tmp_path: Path):
+    storage_config = StorageConfig(
+        refresh_token="test", access_token="test", host=f"file://{tmp_path}"
+    )
+    calls = node_calls.get(node="metered_node", status="ok")
+    errors = node_calls.get(node="metered_node", status="error")
+    written = storage_written_bytes.get()
+    encoded = codec_duration.count(operation="encode", type="Image")
+
+    await metered_node.call(inputs={}, params={}, storage_config=storage_config)
+    with pytest.raises(RuntimeError):
+        await metered_node.call(
+            inputs={"fail": True}, params={}, storage_config=storage_config
+        )
+
+    assert node_calls.get(node="metered_node", status="ok") == calls + 1
+    assert node_calls.get(node="metered_node", status="error") == errors + 1
+    assert node_call_duration.count(node="metered_node") == calls + errors + 2
+    assert node_in_flight.get(node="metered_node") == 0
+    assert storage_written_bytes.get() > written
+    assert codec_duration.count(operation="encode", type="Image") == encoded + 1
+
+
+@pytest.mark.asyncio
+async def test_admission_metrics():
+    node = ToolkitNode(
+        name="admission_metered_node",
+        description="Description",
+        max_concurrency=1,
+        max_queue_size=1,
+        queue_timeout=0.01,
+    )
+
+    @node.on_call
+    async def call(inputs: CoreModel, params: CoreModel):
+        await asyncio.sleep(0.05)
+        return CoreModel()
+
+    storage_config = StorageConfig(
+        refresh_token="test", access_token="test", host="test"
+    )
+    running = asyncio.create_task(node.call({}, {}, storage_config))
+    queued = asyncio.create_task(node.call({}, {}, storage_config))
+    await asyncio.sleep(0)
+    with pytest.raises(NodeOverloadedError):
+        await node.call({}, {}, storage_config)
+    with pytest.raises(NodeOverloadedError):
+        await queued
+    await running
+
+    assert node_queue_wait_duration.count(node="admission_metered_node") == 1
+    metrics = REGISTRY.render().splitlines()
+    labels = '{node="admission_metered_node"}'
+    assert f"hyko_node_admission_rejected_total{labels} 1" in metrics
+    assert f"hyko_node_admission_timed_out_total{labels} 1" in metrics
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import pstats
+import tracemalloc
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from hyko_sdk.definitions import ToolkitNode
+from hyko_sdk.models import CoreModel, StorageConfig
+from hyko_sdk.profiling import Profiler
+from hyko_sdk.server import create_app
+from hyko_sdk.utils import field
+
+profiled_node = ToolkitNode(name="profiled node", description="Description")
+
+
+@profiled_node.set_input
+class ProfiledInputs(CoreModel):
+    delay: float = field(description="delay", default=0)
+
+
+@profiled_node.on_call
+async def profiled_call(inputs: ProfiledInputs, params: CoreModel):
+    await asyncio.sleep(inputs.delay)
+    return CoreModel()
+
+
+storage_config = StorageConfig(refresh_token="test", access_token="test", host="test")
+
+
+@pytest.fixture
+def profile_dir(tmp_path: Path) -> Iterator[Path]:
+    yield tmp_path
+    Profiler.configure(None)
+
+
+@pytest.mark.asyncio
+async def test_sampled_call_is_profiled(profile_dir: Path):
+    Profiler.configure(str(profile_dir), sample_rate=1)
+    await profiled_node.call(inputs={}, params={}, storage_config=storage_config)
+
+    (summary_path,) = profile_dir.glob("profiled_node-*.json")
+    summary = json.loads(summary_path.read_text())
+    assert summary["node"] == "profiled node"
+    assert summary["sampled"]
+
+    prefix = str(summary_path).removesuffix(".json")
+    stats = pstats.Stats(prefix + ".prof")
+    assert any(function == "profiled_call" for _, _, function in stats.stats)  # type: ignore
+    assert tracemalloc.Snapshot.load(prefix + ".tracemalloc").traces
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.asyncio
+async def test_only_slow_calls_are_kept(profile_dir: Path):
+    Profiler.configure(
+        str(profile_dir), sample_rate=0, latency_threshold=0.05, trace_memory=False
+    )
+    await profiled_node.call(inputs={}, params={}, storage_config=storage_config)
+    assert not list(profile_dir.iterdir())
+
+    await profiled_node.call(
+        inputs={"delay": 0.1}, params={}, storage_config=storage_config
+    )
+    (summary_path,) = profile_dir.glob("*.json")
+    assert json.loads(summary_path.read_text())["slow"]
+    assert len(list(profile_dir.iterdir())) == 2
+
+
+@pytest.mark.asyncio
+async def test_profiling_disabled(profile_dir: Path):
+    Profiler.configure(str(profile_dir), sample_rate=0)
+    await profiled_node.call(inputs={}, params={}, storage_config=storage_config)
+    assert not list(profile_dir.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_configure_samples_every_call_by_default(profile_dir: Path):
+    Profiler.configure(str(profile_dir), trace_memory=False)
+    await profiled_node.call(inputs={}, params={}, storage_config=storage_config)
+    assert len(list(profile_dir.glob("*.json"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_streaming_calls_are_profiled(profile_dir: Path):
+    Profiler.configure(str(profile_dir), trace_memory=False)
+    async for _ in profiled_node.call_stream(
+        inputs={}, params={}, storage_config=storage_config
+    ):
+        pass
+
+    response = TestClient(create_app()).post(
+        "/call/profiled node/stream",
+        json={"storage_config": storage_config.model_dump()},
+    )
+    assert response.status_code == 200
+    assert len(list(profile_dir.glob("*.json"))) == 2
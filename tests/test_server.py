@@ -0,0 +1,242 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from hyko_sdk.definitions import ToolkitNode
+from hyko_sdk.models import CoreModel, MetaDataBase
+from hyko_sdk.server import create_app
+from hyko_sdk.utils import field
+
+server_node = ToolkitNode(name="server_node", description="Description")
+
+
+@server_node.set_input
+class Inputs(CoreModel):
+    text: str = field(description="text")
+
+
+@server_node.set_param
+class Params(CoreModel):
+    times: int = field(description="times", default=1)
+
+
+@server_node.set_output
+class Outputs(CoreModel):
+    text: str = field(description="text")
+
+
+started_with: list[Params] = []
+warmed_up_with: list[Params] = []
+
+
+@server_node.on_startup
+async def startup(params: Params):
+    started_with.append(params)
+
+
+@server_node.on_warmup
+async def warmup(params: Params):
+    warmed_up_with.append(params)
+
+
+@server_node.on_call
+async def call(inputs: Inputs, params: Params):
+    return Outputs(text=inputs.text * params.times)
+
+
+storage_config = {"refresh_token": "test", "access_token": "test", "host": "test"}
+
+broken_node = ToolkitNode(name="broken_server_node", description="Description")
+broken_node.set_output(Outputs)
+
+
+@broken_node.on_call
+async def broken_call(inputs: CoreModel, params: CoreModel):
+    return Outputs(text=None)  # type: ignore
+
+
+def test_metadata():
+    with TestClient(create_app()) as client:
+        res = client.get("/metadata")
+
+    assert res.status_code == 200
+    names = [metadata["name"] for metadata in res.json()]
+    assert "server_node" in names
+
+
+def test_call():
+    with TestClient(create_app(startup_params={"server_node": {"times": 3}})) as client:
+        assert started_with
+        assert warmed_up_with[-1].times == 3
+        res = client.post(
+            "/call/server_node",
+            json={
+                "inputs": {"text": "a"},
+                "params": {"times": 2},
+                "storage_config": storage_config,
+            },
+        )
+
+    assert res.status_code == 200
+    assert res.content == b'{"text":"aa"}'
+    assert res.headers["content-type"] == "application/json"
+    assert res.headers["content-length"] == str(len(res.content))
+
+
+def test_call_server_timing():
+    with TestClient(create_app(server_timing=True)) as client:
+        res = client.post(
+            "/call/server_node",
+            json={"inputs": {"text": "a"}, "storage_config": storage_config},
+        )
+
+    assert res.status_code == 200
+    phases = [
+        metric.split(";")[0] for metric in res.headers["Server-Timing"].split(", ")
+    ]
+    assert {"call", "validate", "handler"} <= set(phases)
+
+
+def test_metrics():
+    with TestClient(create_app()) as client:
+        client.post(
+            "/call/server_node",
+            json={"inputs": {"text": "a"}, "storage_config": storage_config},
+        )
+        res = client.get("/metrics")
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    assert 'hyko_node_calls_total{node="server_node",status="ok"}' in res.text
+    assert "# TYPE hyko_node_call_duration_seconds histogram" in res.text
+
+
+def test_call_errors():
+    with TestClient(create_app()) as client:
+        missing = client.post(
+            "/call/missing_node",
+            json={"storage_config": storage_config},
+        )
+        invalid = client.post(
+            "/call/server_node",
+            json={"inputs": {"text": {"a": 1}}, "storage_config": storage_config},
+        )
+
+        malformed = client.post("/call/server_node", content=b"{")
+
+    # Validation errors raised by the handler are server errors.
+    with TestClient(create_app(), raise_server_exceptions=False) as client:
+        broken = client.post(
+            "/call/broken_server_node", json={"storage_config": storage_config}
+        )
+
+    assert missing.status_code == 404
+    assert invalid.status_code == 422
+    assert invalid.json()["detail"][0]["loc"] == ["inputs", "text"]
+    assert malformed.status_code == 422
+    assert broken.status_code == 500
+
+
+def test_health():
+    app = create_app()
+    with TestClient(app) as client:
+        assert client.get("/health/live").status_code == 200
+        assert client.get("/health/ready").status_code == 200
+
+    assert not app.state.executor.ready
+    assert app.state.executor.draining
+
+
+def test_callback():
+    node = ToolkitNode(name="callback_node", description="Description")
+
+    @node.set_param
+    class CallbackParams(CoreModel):
+        choice: str = field(description="choice")
+
+    @node.callback(trigger="choice", id="callback_node_choice")
+    async def refresh(metadata: MetaDataBase, oauth_token: str):
+        metadata.description = oauth_token
+        return metadata
+
+    with TestClient(create_app()) as client:
+        res = client.post(
+            "/callback/callback_node_choice",
+            json={
+                "metadata": node.get_metadata().model_dump(),
+                "oauth_token": "token",
+            },
+        )
+
+    assert res.status_code == 200
+    assert res.json()["description"] == "token"
+
+
+stream_node = ToolkitNode(name="stream_node", description="Description")
+
+
+@stream_node.on_call
+async def stream(inputs: CoreModel, params: CoreModel):
+    for text in ["a", "ab"]:
+        yield Outputs(text=text)
+
+
+def test_call_stream():
+    with TestClient(create_app()) as client:
+        ndjson = client.post(
+            "/call/stream_node/stream",
+            json={"storage_config": storage_config},
+        )
+        sse = client.post(
+            "/call/stream_node/stream?format=sse",
+            json={"storage_config": storage_config},
+        )
+
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in ndjson.text.splitlines()] == [
+        {"text": "a"},
+        {"text": "ab"},
+    ]
+    assert sse.headers["content-type"].startswith("text/event-stream")
+    assert sse.text == 'data: {"text":"a"}\n\ndata: {"text":"ab"}\n\n'
+
+
+failing_stream_node = ToolkitNode(
+    name="failing_stream_node",
+    description="Description",
+    max_concurrency=1,
+    max_queue_size=0,
+)
+
+
+@failing_stream_node.on_call
+async def failing_stream(inputs: CoreModel, params: CoreModel):
+    yield Outputs(text="a")
+    raise RuntimeError("handler bug")
+
+
+def test_call_stream_errors():
+    with TestClient(create_app()) as client:
+        failed = client.post(
+            "/call/failing_stream_node/stream",
+            json={"storage_config": storage_config},
+        )
+
+        # Admission rejections keep their status, load balancers retry them.
+        assert failing_stream_node.admission
+        failing_stream_node.admission.in_flight = 1
+        try:
+            rejected = client.post(
+                "/call/failing_stream_node/stream",
+                json={"storage_config": storage_config},
+            )
+        finally:
+            failing_stream_node.admission.in_flight = 0
+
+    assert failed.status_code == 200
+    assert [json.loads(line) for line in failed.text.splitlines()] == [
+        {"text": "a"},
+        {"error": "Internal Server Error", "status_code": 500},
+    ]
+    assert rejected.status_code == 503
+    assert failing_stream_node.admission.in_flight == 0
@@ -0,0 +1,319 @@
+import asyncio
+import gzip
+import os
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from hyko_sdk.components.components import Ext
+from hyko_sdk.io import CSV, Image
+from hyko_sdk.metrics import storage_deduplicated_bytes
+from hyko_sdk.models import StorageConfig
+from hyko_sdk.storage import (
+    HTTPStorage,
+    LocalStorage,
+    StorageBackend,
+    StorageClients,
+    content_digest,
+    content_index,
+    data_cache,
+    get_backend,
+)
+from hyko_sdk.storage_server import create_storage_app
+
+
+def test_backend_selected_by_host(tmp_path: Path):
+    assert isinstance(get_backend(), HTTPStorage)
+
+    StorageConfig.configure("test", "test", f"file://{tmp_path}")
+    backend = get_backend()
+    assert isinstance(backend, LocalStorage)
+    assert backend.root == str(tmp_path)
+    assert get_backend() is backend
+
+
+@pytest.mark.asyncio
+async def test_storage_clients_stay_open_while_used():
+    clients = StorageClients()
+    clients.max_clients = 1
+    first = ("http://storage", "a", "a")
+    async with clients.use(first) as client:
+        other = clients.get(("http://storage", "b", "b"))
+        assert not client.is_closed
+    assert client.is_closed
+    assert clients.get(first) is not client
+    await other.aclose()
+
+
+@pytest.mark.asyncio
+async def test_media_keep_the_storage_config_they_were_created_with(
+    mock_get_png: mock.MagicMock,
+):
+    name = "7a5ab22a-68ce-11ec-83d7-0242ac130002.png"
+    StorageConfig.configure("refresh", "first", "http://storage")
+    first = Image(obj_ext=Ext.PNG, file_name=name)
+    StorageConfig.configure("refresh", "second", "http://storage")
+    second = Image(obj_ext=Ext.PNG, file_name=name)
+
+    assert first.client.cookies["access_token"] == "Bearer first"
+    assert second.client.cookies["access_token"] == "Bearer second"
+
+    # Downloaded data is only shared between calls with the same credentials.
+    await first.get_data()
+    await second.get_data()
+    assert mock_get_png.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_local_storage_round_trip(tmp_path: Path):
+    StorageConfig.configure("test", "test", f"file://{tmp_path / 'storage'}")
+    image = await Image.from_ndarray(np.zeros((10, 10, 3), dtype=np.uint8))
+    await image.persist()
+
+    assert sorted(os.listdir(tmp_path / "storage")) == [".content", image.file_name]
+    data_cache.clear()
+    stored = Image(obj_ext=Ext.PNG, file_name=image.file_name)
+    assert (await stored.to_ndarray()).shape == (10, 10, 3)
+
+
+@pytest.mark.asyncio
+async def test_local_storage_reads_bytes_or_views(tmp_path: Path):
+    StorageConfig.configure("test", "test", f"file://{tmp_path}")
+    stored = CSV(obj_ext=Ext.CSV)
+    await stored.save(b"a,b\n1,2\n")
+    data_cache.clear()
+
+    data = await CSV(obj_ext=Ext.CSV, file_name=stored.file_name).get_data()
+    assert data.decode() == "a,b\n1,2\n"
+    view = await CSV(obj_ext=Ext.CSV, file_name=stored.file_name).get_view()
+    assert isinstance(view, memoryview)
+    assert view.readonly
+    assert view == data
+
+
+@pytest.mark.asyncio
+async def test_local_storage_reads_large_files_in_a_thread(tmp_path: Path):
+    storage = LocalStorage(str(tmp_path))
+    storage.read_in_thread_above = 4
+    await storage.write("small.csv", b"a,b\n")
+    await storage.write("large.csv", b"a,b\n1,2\n")
+
+    with mock.patch("asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+        assert await storage.read("small.csv") == b"a,b\n"
+        to_thread.assert_not_called()
+        assert await storage.read("large.csv") == b"a,b\n1,2\n"
+        to_thread.assert_called_once()
+
+
+def test_storage_backends_implement_reads_and_writes():
+    class ReadOnly(StorageBackend):
+        async def read(self, file_name: str) -> bytes:
+            return b""
+
+    with pytest.raises(TypeError):
+        ReadOnly()  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_local_storage_errors(tmp_path: Path):
+    storage = LocalStorage(str(tmp_path))
+    with pytest.raises(HTTPException) as e:
+        await storage.read("missing.png")
+    assert e.value.status_code == 500
+
+    for file_name in ("../escape.png", ".hidden.png"):
+        with pytest.raises(HTTPException) as e:
+            await storage.write(file_name, b"data")
+        assert e.value.status_code == 400
+
+    assert await storage.write("file.png", b"") == "file.png"
+    assert await storage.read("file.png") == b""
+    assert os.listdir(tmp_path) == ["file.png"]
+
+
+def test_storage_app(tmp_path: Path):
+    with TestClient(create_storage_app(str(tmp_path))) as client:
+        res = client.post(
+            "/storage/", files={"file": ("file.png", b"data", "image/png")}
+        )
+        assert res.json() == "file.png"
+        assert client.get("/storage/file.png").content == b"data"
+        assert client.get("/storage/other.png").status_code == 404
+        assert client.post("/storage/", content=b"data").status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_identical_uploads_are_deduplicated(mock_post_success: mock.MagicMock):
+    deduplicated = storage_deduplicated_bytes.get()
+    first = Image(obj_ext=Ext.PNG)
+    await first.save(b"data")
+    second = Image(obj_ext=Ext.PNG)
+    await second.save(b"data")
+    other = Image(obj_ext=Ext.JPEG)
+    await other.save(b"data")
+
+    assert mock_post_success.call_count == 2
+    assert second.file_name == first.file_name
+    assert storage_deduplicated_bytes.get() == deduplicated + 4
+
+
+@pytest.mark.asyncio
+async def test_uploads_are_only_deduplicated_per_user(
+    mock_post_success: mock.MagicMock,
+):
+    StorageConfig.configure("refresh", "first", "http://storage")
+    await Image(obj_ext=Ext.PNG).save(b"data")
+    StorageConfig.configure("refresh", "second", "http://storage")
+    await Image(obj_ext=Ext.PNG).save(b"data")
+
+    assert mock_post_success.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_deleted_local_files_are_not_reused(tmp_path: Path):
+    StorageConfig.configure("test", "test", f"file://{tmp_path}")
+    first = Image(obj_ext=Ext.PNG)
+    await first.save(b"data")
+    os.remove(tmp_path / first.file_name)
+
+    second = Image(obj_ext=Ext.PNG)
+    await second.save(b"data")
+    assert second.file_name != first.file_name
+    assert os.path.exists(tmp_path / second.file_name)
+
+
+@pytest.mark.asyncio
+async def test_local_storage_finds_content_stored_by_other_workers(tmp_path: Path):
+    StorageConfig.configure("test", "test", f"file://{tmp_path}")
+    first = Image(obj_ext=Ext.PNG)
+    await first.save(b"data")
+    content_index.clear()
+
+    second = Image(obj_ext=Ext.PNG)
+    await second.save(b"data")
+    assert second.file_name == first.file_name
+    assert sorted(os.listdir(tmp_path)) == [".content", first.file_name]
+
+    os.remove(tmp_path / first.file_name)
+    content_index.clear()
+    third = Image(obj_ext=Ext.PNG)
+    await third.save(b"data")
+    assert third.file_name != first.file_name
+    content_index.clear()
+    assert await LocalStorage(str(tmp_path)).lookup(
+        content_digest(b"data"), ".png"
+    ) == (third.file_name)
+
+
+@pytest.mark.asyncio
+async def test_http_storage_lookup(mock_post_success: mock.MagicMock):
+    with mock.patch("httpx.AsyncClient.get") as mock_get:
+        mock_get.return_value = mock.Mock(is_success=True, json=lambda: "stored.png")
+        await Image(obj_ext=Ext.PNG).save(b"data")
+        assert not mock_get.called
+
+        HTTPStorage.configure(lookup_enabled=True)
+        image = Image(obj_ext=Ext.PNG)
+        try:
+            content_index.clear()
+            await image.save(b"data")
+        finally:
+            HTTPStorage.configure(lookup_enabled=False)
+
+    digest = content_digest(b"data")
+    mock_get.assert_called_once_with(url=f"/storage/lookup/{digest}.png")
+    assert image.file_name == "stored.png"
+    assert mock_post_success.call_count == 1
+
+
+def test_storage_app_lookup(tmp_path: Path):
+    digest = content_digest(b"data")
+    with TestClient(create_storage_app(str(tmp_path))) as client:
+        assert client.get(f"/storage/lookup/{digest}.png").status_code == 404
+        client.post("/storage/", files={"file": ("file.png", b"data", "image/png")})
+        assert client.get(f"/storage/lookup/{digest}.png").json() == "file.png"
+        assert client.get(f"/storage/lookup/{digest}.jpeg").status_code == 404
+
+
+def test_upload_compression():
+    storage = HTTPStorage()
+    csv = b"name,count\n" + b"node,1\n" * 1000
+    assert not storage.compress("file.csv", len(csv))
+    HTTPStorage.configure(compress_uploads=True)
+    try:
+        assert storage.compress("file.csv", len(csv))
+        assert not storage.compress("file.png", len(csv))
+        assert not storage.compress("file.csv", 100)
+    finally:
+        HTTPStorage.configure(compress_uploads=False)
+
+    body, headers = storage.upload_body("file.csv", csv, compress=True)
+    assert headers["Content-Encoding"] == "gzip"
+    assert len(body) < len(csv) / 10
+    assert csv in gzip.decompress(body)
+    plain, headers = storage.upload_body("file.csv", csv, compress=False)
+    assert "Content-Encoding" not in headers
+    assert csv in plain
+
+    # Data that does not compress is sent as is.
+    _, headers = storage.upload_body("file.csv", os.urandom(10_000), compress=True)
+    assert "Content-Encoding" not in headers
+
+
+@pytest.mark.asyncio
+async def test_rejected_compression_falls_back_to_plain_uploads():
+    csv = b"name,count\n" + b"node,1\n" * 1000
+    stored = mock.Mock(status_code=200, is_success=True, json=lambda: "file.csv")
+    HTTPStorage.configure(compress_uploads=True)
+    try:
+        for status_code in (400, 415, 422):
+            rejected = mock.Mock(status_code=status_code, is_success=False)
+            with mock.patch("httpx.AsyncClient.post") as mock_post:
+                mock_post.side_effect = [rejected, stored, stored]
+                assert await HTTPStorage().write("file.csv", csv) == "file.csv"
+                assert await HTTPStorage().write("file.csv", csv) == "file.csv"
+
+            encodings = [
+                call.kwargs["headers"].get("Content-Encoding")
+                for call in mock_post.call_args_list
+            ]
+            assert encodings == ["gzip", None, None]
+            HTTPStorage._plain_upload_hosts.clear()
+    finally:
+        HTTPStorage.configure(compress_uploads=False)
+        HTTPStorage._plain_upload_hosts.clear()
+
+
+def test_storage_configure_keeps_unset_options():
+    HTTPStorage.configure(lookup_enabled=True)
+    try:
+        HTTPStorage.configure(compression_level=6)
+        assert HTTPStorage.lookup_enabled
+        assert not HTTPStorage.compress_uploads
+    finally:
+        HTTPStorage.configure(lookup_enabled=False, compression_level=1)
+
+
+def test_storage_app_compression(tmp_path: Path):
+    csv = b"name,count\n" + b"node,1\n" * 1000
+    storage = HTTPStorage()
+    body, headers = storage.upload_body("file.csv", csv, compress=True)
+    with TestClient(create_storage_app(str(tmp_path))) as client:
+        assert client.post("/storage/", content=body, headers=headers).is_success
+        assert (tmp_path / "file.csv").read_bytes() == csv
+
+        res = client.get("/storage/file.csv")
+        assert res.headers["Content-Encoding"] == "gzip"
+        assert res.content == csv
+
+        res = client.post(
+            "/storage/", content=body, headers={**headers, "Content-Encoding": "br"}
+        )
+        assert res.status_code == 415
+
+        client.post("/storage/", files={"file": ("file.png", csv, "image/png")})
+        assert "Content-Encoding" not in client.get("/storage/file.png").headers
@@ -0,0 +1,97 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+import pytest
+
+from hyko_sdk.definitions import ToolkitNode
+from hyko_sdk.io import Image
+from hyko_sdk.models import CoreModel, StorageConfig
+from hyko_sdk.tracing import Tracing, collect_timings, span
+from hyko_sdk.utils import field
+
+traced_node = ToolkitNode(name="traced_node", description="Description")
+
+
+@traced_node.set_input
+class TracedInputs(CoreModel):
+    size: int = field(description="size")
+
+
+@traced_node.set_output
+class TracedOutputs(CoreModel):
+    image: Image = field(description="image")
+
+
+@traced_node.on_call
+async def traced_call(inputs: TracedInputs, params: CoreModel):
+    return TracedOutputs(
+        image=await Image.from_ndarray(
+            np.zeros((inputs.size, inputs.size, 3), np.uint8)
+        )
+    )
+
+
+class FakeTracer:
+    def __init__(self):
+        self.spans: list[tuple[str, dict[str, Any]]] = []
+
+    @contextmanager
+    def start_as_current_span(
+        self, name: str, attributes: dict[str, Any]
+    ) -> Iterator[None]:
+        self.spans.append((name, attributes))
+        yield
+
+
+def test_span_is_noop_when_disabled():
+    assert span("decode") is span("encode")
+
+
+@pytest.mark.asyncio
+async def test_call_timings(tmp_path: Path):
+    with collect_timings() as timings:
+        await traced_node.call(
+            inputs={"size": 8},
+            params={},
+            storage_config=StorageConfig(
+                refresh_token="test", access_token="test", host=f"file://{tmp_path}"
+            ),
+        )
+
+    assert {
+        "call",
+        "validate",
+        "handler",
+        "persist",
+        "encode",
+        "storage.upload",
+    } <= set(timings.durations)
+    assert timings.durations["call"] >= timings.durations["handler"]
+    assert "handler;dur=" in timings.header()
+
+
+@pytest.mark.asyncio
+async def test_spans_are_exported_to_tracer(tmp_path: Path):
+    tracer = FakeTracer()
+    Tracing.configure(tracer)
+    try:
+        await traced_node.call(
+            inputs={"size": 8},
+            params={},
+            storage_config=StorageConfig(
+                refresh_token="test", access_token="test", host=f"file://{tmp_path}"
+            ),
+        )
+    finally:
+        Tracing.configure(None)
+
+    names = [name for name, _ in tracer.spans]
+    assert names[:3] == ["call", "validate", "handler"]
+    assert ("encode", {"type": "Image"}) in tracer.spans
+    assert all(
+        attributes == {"node": "traced_node"}
+        for name, attributes in tracer.spans
+        if name in ("call", "validate", "handler", "persist")
+    )